@@ -0,0 +1,75 @@
+"""Validating and hashing torrents: ``scan_torrent`` against torrentool.
+
+The old path decoded each payload with torrentool once to validate it and
+once more to hash its re-encoded info dict. Run from ``backend/src``::
+
+    python -m benchmarks.bench_bencode
+"""
+
+import argparse
+import time
+
+from torrentool.bencode import Bencode
+from torrentool.exceptions import BencodeDecodingError
+from torrentool.torrent import Torrent
+
+from module.utils.bencode import scan_torrent
+
+
+def make_torrent(files: int, pieces: int) -> bytes:
+    info = {
+        "name": "[Group] Title [01-24][1080p]",
+        "piece length": 1 << 20,
+        "pieces": bytes(range(20)) * pieces,
+        "files": [
+            {"length": 700 << 20, "path": [f"[Group] Title - {i:02d} [1080p].mkv"]}
+            for i in range(files)
+        ],
+    }
+    return Bencode.encode({"announce": "http://tracker.example/announce", "info": info})
+
+
+def torrentool_path(content: bytes) -> str | None:
+    try:
+        if not Bencode.decode(content):
+            return None
+    except BencodeDecodingError:
+        return None
+    decoded = Bencode.decode(content)
+    if not isinstance(decoded, dict):
+        return None
+    return Torrent(decoded).info_hash
+
+
+def scan_path(content: bytes) -> str | None:
+    scan = scan_torrent(content)
+    return scan.info_hash if scan.valid else None
+
+
+def best_of(rounds: int, run, batch: list[bytes]) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for content in batch:
+            run(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    # A season pack grows with its episode count and total size.
+    for files, pieces in ((12, 500), (24, 2000), (26, 8000), (52, 16000)):
+        batch = [make_torrent(files, pieces) for _ in range(10)]
+        assert torrentool_path(batch[0]) == scan_path(batch[0])
+        size = sum(map(len, batch)) / (1 << 20)
+        old = best_of(args.rounds, torrentool_path, batch)
+        new = best_of(args.rounds, scan_path, batch)
+        print(f"{size:.2f} MiB batch: {old * 1000:9.1f} ms -> {new * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
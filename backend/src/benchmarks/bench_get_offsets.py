@@ -0,0 +1,95 @@
+"""Resolving rename offsets: ``get_offsets`` against one session per torrent.
+
+Renamer used to open a session per torrent and call ``get_bangumi_id`` and
+``get_offset``. Run from ``backend/src``::
+
+    python -m benchmarks.bench_get_offsets
+"""
+
+import argparse
+import asyncio
+import time
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.pool import StaticPool
+
+from module.database.combine import Database
+from module.models import Bangumi, Torrent
+
+
+async def seed(engine, torrents: int, bangumi: int) -> list[str]:
+    async with Database(engine) as db:
+        await db.create_table()
+        await db.bangumi.add_all(
+            [
+                Bangumi(
+                    official_title=f"Title {i}", title_raw=f"Title {i}", offset=i % 4
+                )
+                for i in range(bangumi)
+            ]
+        )
+        # A fifth of the hashes belong to no bangumi, like manual downloads.
+        await db.torrent.add_all(
+            [
+                Torrent(
+                    name=f"[Sub] Title {i % bangumi} - {i}",
+                    url=f"https://a.example/{i}.torrent",
+                    hash=f"{i:040x}",
+                    bangumi_id=None if i % 5 == 0 else i % bangumi + 1,
+                )
+                for i in range(torrents)
+            ]
+        )
+    return [f"{i:040x}" for i in range(torrents)]
+
+
+async def per_torrent(engine, hashes: list[str]) -> dict[str, int]:
+    offsets = {}
+    for _hash in hashes:
+        async with Database(engine) as db:
+            bangumi_id = await db.torrent.get_bangumi_id(_hash)
+            offsets[_hash] = (
+                await db.bangumi.get_offset(bangumi_id) if bangumi_id else 0
+            )
+    return offsets
+
+
+async def batched(engine, hashes: list[str]) -> dict[str, int]:
+    async with Database(engine) as db:
+        found = await db.torrent.get_offsets(hashes)
+    return {_hash: found.get(_hash, (None, 0))[1] for _hash in hashes}
+
+
+async def run(torrents: int, bangumi: int):
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    hashes = await seed(engine, torrents, bangumi)
+    results = []
+    for label, resolve in (
+        ("per-torrent sessions", per_torrent),
+        ("get_offsets", batched),
+    ):
+        start = time.perf_counter()
+        results.append(await resolve(engine, hashes))
+        print(f"{label}: {time.perf_counter() - start:.2f}s")
+    assert results[0] == results[1]
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--torrents", type=int, default=5000)
+    parser.add_argument("--bangumi", type=int, default=200)
+    args = parser.parse_args()
+
+    logger.remove()
+    print(f"{args.torrents} torrents over {args.bangumi} bangumi")
+    asyncio.run(run(args.torrents, args.bangumi))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Titles per second through ``raw_parser`` over ``fixtures/titles.txt``.
+
+Run from ``backend/src``::
+
+    python -m benchmarks.bench_raw_parser
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from module.parser.analyser import raw_parser
+from module.parser.analyser.raw_parser import _process, enclosed
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_titles() -> list[str]:
+    return (FIXTURES / "titles.txt").read_text(encoding="utf-8").splitlines()
+
+
+def parse(title: str):
+    # TitleParser treats a parser exception like an unparsable title.
+    try:
+        return raw_parser(title)
+    except Exception:
+        return None
+
+
+def best_of(rounds: int, run) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    logger.remove()
+    titles = load_titles()
+
+    def cold():
+        _process.cache_clear()
+        enclosed.cache_clear()
+        for title in titles:
+            parse(title)
+
+    def warm():
+        for title in titles:
+            parse(title)
+
+    parsed = sum(parse(title) is not None for title in titles)
+    print(f"{len(titles)} titles, {parsed} parsed")
+    for label, run in (("cold", cold), ("warm", warm)):
+        elapsed = best_of(args.rounds, run)
+        print(f"{label}: {len(titles) / elapsed:,.0f} titles/s")
+
+
+if __name__ == "__main__":
+    main()
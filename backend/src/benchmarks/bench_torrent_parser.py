@@ -0,0 +1,58 @@
+"""Paths per second through ``torrent_parser`` over ``fixtures/paths.txt``.
+
+Run from ``backend/src``::
+
+    python -m benchmarks.bench_torrent_parser
+"""
+
+import argparse
+from pathlib import Path
+
+from loguru import logger
+
+from module.parser.analyser import torrent_parser
+from module.parser.analyser.torrent_parser import parse_name
+
+from .bench_raw_parser import FIXTURES, best_of
+
+SUBTITLE_SUFFIXES = {".ass", ".srt"}
+
+
+def load_paths() -> list[tuple[str, str]]:
+    paths = (FIXTURES / "paths.txt").read_text(encoding="utf-8").splitlines()
+    return [
+        (path, "subtitle" if Path(path).suffix in SUBTITLE_SUFFIXES else "media")
+        for path in paths
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    logger.remove()
+    paths = load_paths()
+
+    def cold():
+        parse_name.cache_clear()
+        for path, file_type in paths:
+            torrent_parser(path, file_type=file_type)
+
+    def warm():
+        for path, file_type in paths:
+            torrent_parser(path, file_type=file_type)
+
+    parsed = sum(
+        torrent_parser(path, file_type=file_type) is not None
+        for path, file_type in paths
+    )
+    print(f"{len(paths)} paths, {parsed} parsed")
+    for label, run in (("cold", cold), ("warm", warm)):
+        elapsed = best_of(args.rounds, run)
+        print(f"{label}: {len(paths) / elapsed:,.0f} paths/s")
+    print(parse_name.cache_info())
+
+
+if __name__ == "__main__":
+    main()
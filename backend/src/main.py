@@ -1,5 +1,6 @@
 import os
 
+import httpx2
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
@@ -13,7 +14,6 @@ from qbittorrentapi.exceptions import (
     LoginFailed,
     Unauthorized401Error,
 )
-from requests.exceptions import ConnectionError as RequestsConnectionError
 
 from module.api import v1
 from module.conf import VERSION, settings, setup_logger
@@ -49,7 +49,7 @@ ERROR_MESSAGES: tuple[tuple[type[Exception], str, str], ...] = (
         "无法连接下载器。",
     ),
     (
-        RequestsConnectionError,
+        httpx2.TransportError,
         "Network connection failed.",
         "网络连接失败。",
     ),
@@ -6,6 +6,7 @@ from loguru import logger
 
 from module.conf import settings, setup_logger
 from module.models import APIResponse, Config
+from module.rss import RSSEngine
 from module.security.api import get_current_user
 
 router = APIRouter(prefix="/config", tags=["config"])
@@ -21,8 +22,13 @@ async def get_config():
 )
 async def update_config(config: Config):
     try:
+        old_filter = list(settings.rss_parser.filter)
         await asyncio.to_thread(settings.save, config.model_dump_json(by_alias=True))
         await asyncio.to_thread(settings.load)
+        if settings.rss_parser.filter != old_filter:
+            # Items the old filter dropped are behind the feeds' watermarks.
+            async with RSSEngine() as engine:
+                await engine.rss.rescan_all()
         # update_rss()
         setup_logger()
         logger.info("Config updated")
@@ -8,7 +8,9 @@ from loguru import logger
 
 from module.conf import VERSION
 from module.core import Program
+from module.downloader import download_session
 from module.models import APIResponse
+from module.network import http_pool
 from module.security.api import get_current_user
 
 from .response import u_response
@@ -18,9 +20,10 @@ program = Program()
 
 @asynccontextmanager
 async def lifespan(_router: APIRouter):
-    await program.startup()
-    yield
-    await program.stop()
+    async with http_pool(), download_session():
+        await program.startup()
+        yield
+        await program.stop()
 
 
 router = APIRouter(tags=["program"], lifespan=lifespan)
@@ -5,7 +5,15 @@ from fastapi.responses import JSONResponse
 
 from module.downloader import DownloadClient
 from module.manager import SeasonCollector
-from module.models import APIResponse, Bangumi, RSSItem, RSSUpdate, Torrent
+from module.models import (
+    APIResponse,
+    Bangumi,
+    ResponseModel,
+    RSSItem,
+    RSSUpdate,
+    Torrent,
+)
+from module.models.bangumi import check_filter
 from module.rss import RSSAnalyser, RSSEngine
 from module.security.api import UNAUTHORIZED, get_current_user
 
@@ -153,7 +161,7 @@ async def update_rss(
 )
 async def refresh_all():
     async with RSSEngine() as engine, DownloadClient() as client:
-        await engine.refresh_rss(client)
+        await engine.refresh_rss(client, force=True)
     return JSONResponse(
         status_code=200,
         content={
@@ -170,7 +178,7 @@ async def refresh_all():
 )
 async def refresh_rss(rss_id: int):
     async with RSSEngine() as engine, DownloadClient() as client:
-        await engine.refresh_rss(client, rss_id)
+        await engine.refresh_rss(client, rss_id, force=True)
     return JSONResponse(
         status_code=200,
         content={
@@ -196,6 +204,22 @@ async def get_torrent(
 analyser = RSSAnalyser()
 
 
+def _invalid_filter(data: Bangumi) -> JSONResponse | None:
+    # FastAPI builds table models without running their validators.
+    try:
+        check_filter(data.filter)
+    except ValueError as e:
+        return u_response(
+            ResponseModel(
+                status=False,
+                status_code=406,
+                msg_en=str(e),
+                msg_zh=f"过滤器无效: {e}",
+            )
+        )
+    return None
+
+
 @router.post(
     "/analysis", response_model=Bangumi, dependencies=[Depends(get_current_user)]
 )
@@ -211,6 +235,8 @@ async def analysis(rss: RSSItem):
     "/collect", response_model=APIResponse, dependencies=[Depends(get_current_user)]
 )
 async def download_collection(data: Bangumi):
+    if (error := _invalid_filter(data)) is not None:
+        return error
     async with SeasonCollector() as collector:
         resp = await collector.collect_season(data, data.rss_link)
         return u_response(resp)
@@ -220,6 +246,8 @@ async def download_collection(data: Bangumi):
     "/subscribe", response_model=APIResponse, dependencies=[Depends(get_current_user)]
 )
 async def subscribe(data: Bangumi, rss: RSSItem):
+    if (error := _invalid_filter(data)) is not None:
+        return error
     async with SeasonCollector() as collector:
         resp = await collector.subscribe_season(data, parser=rss.parser)
         return u_response(resp)
@@ -231,6 +259,8 @@ async def subscribe(data: Bangumi, rss: RSSItem):
     dependencies=[Depends(get_current_user)],
 )
 async def force_collect(data: Bangumi):
+    if (error := _invalid_filter(data)) is not None:
+        return error
     async with SeasonCollector() as collector:
         resp = await collector.force_collect(data)
     return u_response(resp)
@@ -7,6 +7,8 @@ from .search_provider import SEARCH_CONFIG
 TMDB_API = "32b19d6a05b512190a056fa4e747cbbc"
 DATA_PATH = "sqlite+aiosqlite:///data/data.db"
 POSTERS_PATH = Path("data/posters")
+TORRENTS_PATH = Path("data/torrents")
+TMDB_CACHE_PATH = Path("data/tmdb")
 
 PLATFORM = "Windows" if "\\" in settings.downloader.path else "Unix"
 
@@ -19,5 +21,7 @@ __all__ = [
     "TMDB_API",
     "DATA_PATH",
     "POSTERS_PATH",
+    "TORRENTS_PATH",
+    "TMDB_CACHE_PATH",
     "PLATFORM",
 ]
@@ -3,10 +3,12 @@ import asyncio
 from loguru import logger
 
 from module.conf import VERSION, settings
+from module.downloader import expire_download_session
 from module.models import ResponseModel
 from module.update import (
     cache_image,
     first_run,
+    schema_migration,
     torrent_migration,
 )
 
@@ -37,6 +39,7 @@ class Program(RenameThread, RSSThread):
             await first_run()
             logger.info("[Core] No db file exists, create database file.")
             return {"status": "First run detected."}
+        await schema_migration()
         if not self.img_cache:
             logger.info("[Core] No image cache exists, create image cache.")
             await cache_image()
@@ -95,6 +98,8 @@ class Program(RenameThread, RSSThread):
             running = self.is_running
             self._running = False
             await self._workers.stop()
+            # Log out so the next start checks the downloader afresh.
+            await expire_download_session()
             if running:
                 return ResponseModel(
                     status=True,
@@ -1,5 +1,7 @@
 import asyncio
+from collections.abc import Callable
 
+import httpx2
 from loguru import logger
 from qbittorrentapi.exceptions import (
     APIConnectionError,
@@ -7,7 +9,6 @@ from qbittorrentapi.exceptions import (
     LoginFailed,
     Unauthorized401Error,
 )
-from requests.exceptions import ConnectionError
 
 from module.checker import Checker
 
@@ -15,6 +16,12 @@ from .worker import WorkerGroup
 
 DOWNLOADER_RETRY_INTERVAL = 30
 IP_BAN_RETRY_INTERVAL = 300
+# Transport errors meaning the downloader is down, not misconfigured.
+CONNECTION_ERRORS = (
+    httpx2.NetworkError,
+    httpx2.ConnectTimeout,
+    httpx2.RemoteProtocolError,
+)
 
 
 class ProgramStatus(Checker):
@@ -45,8 +52,13 @@ class ProgramStatus(Checker):
             logger.debug(debug_message)
         await asyncio.sleep(interval)
 
-    async def _run_loop(self, work, cycle_seconds: int, component: str):
-        """Run a worker in a loop, waiting for the downloader when needed."""
+    async def _run_loop(
+        self, work, cycle_seconds: float | Callable[[], float], component: str
+    ):
+        """Run a worker in a loop, waiting for the downloader when needed.
+
+        ``cycle_seconds`` may be a callable to let the worker pick its next sleep.
+        """
         waiting_recovery = False
         while True:
             try:
@@ -69,7 +81,7 @@ class ProgramStatus(Checker):
                 waiting_recovery = True
                 continue
             except APIConnectionError as e:
-                if not isinstance(e.__context__, ConnectionError):
+                if not isinstance(e.__context__, CONNECTION_ERRORS):
                     logger.exception("[{}] error: {}", component, e)
                 else:
                     await self._wait_recovery(
@@ -88,7 +100,9 @@ class ProgramStatus(Checker):
             except Exception as e:
                 logger.exception("[{}] error: {}", component, e)
             waiting_recovery = False
-            await asyncio.sleep(cycle_seconds)
+            await asyncio.sleep(
+                cycle_seconds() if callable(cycle_seconds) else cycle_seconds
+            )
 
     @property
     def enable_rss(self):
@@ -5,6 +5,7 @@ from module.downloader import DownloadClient
 from module.manager import Renamer, eps_complete
 from module.notification import PostNotification
 from module.rss import RSSAnalyser, RSSEngine
+from module.rss.scheduler import MIN_INTERVAL
 
 from .status import ProgramStatus
 
@@ -13,14 +14,23 @@ class RSSThread(ProgramStatus):
     def __init__(self):
         super().__init__()
         self.analyser = RSSAnalyser()
+        self._rss_delay: float | None = None
+
+    def _rss_cycle(self) -> float:
+        # Sleep until the next feed is due, but wake up at least every rss_time.
+        rss_time = settings.program.rss_time
+        if self._rss_delay is None:
+            return rss_time
+        return min(max(self._rss_delay, min(MIN_INTERVAL, rss_time)), rss_time)
 
     async def _rss_async_loop(self):
-        await self._run_loop(self._rss_loop, settings.program.rss_time, "RSS")
+        await self._run_loop(self._rss_loop, self._rss_cycle, "RSS")
 
     async def _rss_loop(self):
         async with DownloadClient() as client, RSSEngine() as engine:
             # Run RSS Engine
-            await engine.refresh_rss(client)
+            await engine.refresh_rss(client, due_only=True)
+            self._rss_delay = await engine.next_poll_delay()
         if settings.bangumi_manage.eps_complete:
             await eps_complete()
 
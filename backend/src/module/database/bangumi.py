@@ -1,15 +1,102 @@
+import re
+from typing import NamedTuple
+
 from loguru import logger
 from sqlalchemy.sql import func
-from sqlmodel import and_, delete, false, select
+from sqlmodel import and_, delete, false, or_, select, true, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from module.models import Bangumi, BangumiUpdate
+from module.models import Bangumi, BangumiUpdate, RSSItem
+
+
+class _Title(NamedTuple):
+    id: int
+    title_raw: str
+    rss_link: str
+    deleted: bool
+
+
+class TitleMatcher:
+    """Every title_raw compiled into one alternation.
+
+    A single regex pass tells whether a torrent name contains any title at
+    all, which is the common "no" answer for aggregate feeds. Only on a hit
+    are the titles checked in id order, so the result is the same row the
+    ``instr`` query used to return.
+    """
+
+    def __init__(self, titles: list[_Title]):
+        self.titles = titles
+        self._all = self._compile(titles)
+        self._active = self._compile([t for t in titles if not t.deleted])
+
+    @staticmethod
+    def _compile(titles: list[_Title]) -> re.Pattern | None:
+        if not titles:
+            return None
+        return re.compile("|".join(re.escape(t.title_raw) for t in titles))
+
+    def match(self, torrent_name: str, include_deleted: bool = False) -> _Title | None:
+        pattern = self._all if include_deleted else self._active
+        if pattern is None or pattern.search(torrent_name) is None:
+            return None
+        for title in self.titles:
+            if (
+                include_deleted or not title.deleted
+            ) and title.title_raw in torrent_name:
+                return title
+        return None
+
+
+# Fields that decide which feed items a bangumi picks up.
+MATCH_FIELDS = ("filter", "title_raw", "rss_link", "deleted")
+
+# Matchers per engine, dropped whenever a bangumi is written.
+_matchers: dict[object, TitleMatcher] = {}
+_generation = 0
+
+
+def _invalidate_matchers():
+    global _generation
+    _generation += 1
+    _matchers.clear()
 
 
 class BangumiDatabase:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def matcher(self) -> TitleMatcher:
+        key = self.session.bind
+        matcher = _matchers.get(key)
+        if matcher is None:
+            generation = _generation
+            statement = select(
+                Bangumi.id, Bangumi.title_raw, Bangumi.rss_link, Bangumi.deleted
+            ).order_by(Bangumi.id)
+            rows = (await self.session.exec(statement)).all()
+            matcher = TitleMatcher([_Title(*row) for row in rows])
+            # Don't keep a matcher built while a write was going on.
+            if generation == _generation:
+                _matchers[key] = matcher
+        return matcher
+
+    async def _rescan_feeds(self, *rss_links: str):
+        # Feeds are only parsed down to their watermark, forget it so items
+        # skipped under the old rules are matched again on the next poll.
+        # Active aggregate feeds are matched against every rule.
+        urls = {url for links in rss_links for url in links.split(",") if url}
+        await self.session.exec(
+            update(RSSItem)
+            .where(
+                or_(
+                    RSSItem.url.in_(urls),
+                    and_(RSSItem.aggregate == true(), RSSItem.enabled == true()),
+                )
+            )
+            .values(etag=None, last_modified=None, content_hash=None, watermark=None)
+        )
+
     async def add(self, data: Bangumi):
         statement = select(Bangumi).where(Bangumi.title_raw == data.title_raw)
         bangumi = (await self.session.exec(statement)).first()
@@ -17,13 +104,16 @@ class BangumiDatabase:
             data.id = bangumi.id
             return False
         self.session.add(data)
+        await self._rescan_feeds(data.rss_link)
         await self.session.commit()
+        _invalidate_matchers()
         logger.debug("[Database] Insert {} into database.", data.official_title)
         return True
 
     async def add_all(self, datas: list[Bangumi]):
         self.session.add_all(datas)
         await self.session.commit()
+        _invalidate_matchers()
         logger.debug("[Database] Insert {} bangumi into database.", len(datas))
 
     async def update(
@@ -38,10 +128,18 @@ class BangumiDatabase:
         if not db_data:
             return False
         bangumi_data = data.model_dump(exclude_unset=True)
+        old_links = db_data.rss_link
+        rules_changed = any(
+            key in MATCH_FIELDS and getattr(db_data, key) != value
+            for key, value in bangumi_data.items()
+        )
         for key, value in bangumi_data.items():
             setattr(db_data, key, value)
         self.session.add(db_data)
+        if rules_changed:
+            await self._rescan_feeds(old_links, db_data.rss_link)
         await self.session.commit()
+        _invalidate_matchers()
         await self.session.refresh(db_data)
         logger.debug("[Database] Update {}", data.official_title)
         return True
@@ -49,6 +147,7 @@ class BangumiDatabase:
     async def update_all(self, datas: list[Bangumi]):
         self.session.add_all(datas)
         await self.session.commit()
+        _invalidate_matchers()
         logger.debug("[Database] Update {} bangumi.", len(datas))
 
     async def update_rss(self, title_raw, rss_set: str):
@@ -61,6 +160,7 @@ class BangumiDatabase:
         bangumi.added = False
         self.session.add(bangumi)
         await self.session.commit()
+        _invalidate_matchers()
         await self.session.refresh(bangumi)
         logger.debug("[Database] Update {} rss_link to {}.", title_raw, rss_set)
 
@@ -69,12 +169,14 @@ class BangumiDatabase:
         bangumi = (await self.session.exec(statement)).first()
         await self.session.delete(bangumi)
         await self.session.commit()
+        _invalidate_matchers()
         logger.debug("[Database] Delete bangumi id: {}.", _id)
 
     async def delete_all(self):
         statement = delete(Bangumi)
         await self.session.exec(statement)
         await self.session.commit()
+        _invalidate_matchers()
 
     async def search_all(self) -> list[Bangumi]:
         statement = select(Bangumi)
@@ -102,34 +204,27 @@ class BangumiDatabase:
             return ""
 
     async def match_list(self, torrent_list: list, rss_link: str) -> list:
-        match_datas = await self.search_all()
-        if not match_datas:
+        matcher = await self.matcher()
+        if not matcher.titles:
             return torrent_list
         # Match title
-        i = 0
-        while i < len(torrent_list):
-            torrent = torrent_list[i]
-            for match_data in match_datas:
-                if match_data.title_raw in torrent.name:
-                    if rss_link not in match_data.rss_link:
-                        match_data.rss_link += f",{rss_link}"
-                        await self.update_rss(match_data.title_raw, match_data.rss_link)
-                    torrent_list.pop(i)
-                    break
-            else:
-                i += 1
-        return torrent_list
+        unmatched = []
+        for torrent in torrent_list:
+            match_data = matcher.match(torrent.name, include_deleted=True)
+            if match_data is None:
+                unmatched.append(torrent)
+            elif rss_link not in match_data.rss_link:
+                await self.update_rss(
+                    match_data.title_raw, f"{match_data.rss_link},{rss_link}"
+                )
+                matcher = await self.matcher()
+        return unmatched
 
     async def match_torrent(self, torrent_name: str) -> Bangumi | None:
-        statement = select(Bangumi).where(
-            and_(
-                func.instr(torrent_name, Bangumi.title_raw) > 0,
-                # use `false()` to avoid E712 checking
-                # see: https://docs.astral.sh/ruff/rules/true-false-comparison/
-                Bangumi.deleted == false(),
-            )
-        )
-        return (await self.session.exec(statement)).first()
+        match_data = (await self.matcher()).match(torrent_name)
+        if match_data is None:
+            return None
+        return await self.session.get(Bangumi, match_data.id)
 
     async def not_complete(self) -> list[Bangumi]:
         # Find eps_complete = False
@@ -149,6 +244,7 @@ class BangumiDatabase:
         bangumi.deleted = True
         self.session.add(bangumi)
         await self.session.commit()
+        _invalidate_matchers()
         await self.session.refresh(bangumi)
         logger.debug("[Database] Disable rule {}.", bangumi.title_raw)
 
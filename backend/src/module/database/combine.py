@@ -3,6 +3,7 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .bangumi import BangumiDatabase
 from .engine import engine as e
+from .rename import RenameDatabase
 from .rss import RSSDatabase
 from .torrent import TorrentDatabase
 from .user import UserDatabase
@@ -16,6 +17,7 @@ class Database(AsyncSession):
         self.torrent = TorrentDatabase(self)
         self.bangumi = BangumiDatabase(self)
         self.user = UserDatabase(self)
+        self.rename = RenameDatabase(self)
 
     async def create_table(self):
         async with self.engine.begin() as conn:
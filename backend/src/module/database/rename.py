@@ -0,0 +1,44 @@
+from itertools import batched
+
+from loguru import logger
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from module.models import RenameRecord
+
+from .torrent import CHUNK_SIZE
+
+
+class RenameDatabase:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def search_hashes(self, hashes: list[str]) -> dict[str, RenameRecord]:
+        records: dict[str, RenameRecord] = {}
+        for chunk in batched(set(hashes), CHUNK_SIZE, strict=False):
+            statement = select(RenameRecord).where(
+                RenameRecord.hash.in_(chunk)  # type: ignore[attr-defined]
+            )
+            records.update(
+                (record.hash, record) for record in await self.session.exec(statement)
+            )
+        return records
+
+    async def add_all(self, records: list[RenameRecord]):
+        if not records:
+            return
+        statement = insert(RenameRecord)
+        statement = statement.on_conflict_do_update(
+            index_elements=["hash"],
+            set_={
+                field: statement.excluded[field]
+                for field in ("fingerprint", "offset", "rename_method")
+            },
+        )
+        await self.session.exec(
+            statement,
+            params=[record.model_dump(exclude={"id"}) for record in records],
+        )
+        await self.session.commit()
+        logger.debug("[Database] Mark {} torrents as renamed.", len(records))
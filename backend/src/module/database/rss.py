@@ -1,5 +1,5 @@
 from loguru import logger
-from sqlmodel import delete, select, true
+from sqlmodel import delete, select, true, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from module.models import RSSItem, RSSUpdate
@@ -35,6 +35,10 @@ class RSSDatabase:
             return False
         # Update
         dict_data = data.model_dump(exclude_unset=True)
+        if dict_data.get("url", db_data.url) != db_data.url:
+            # Validators and watermark belong to the old feed.
+            db_data.etag = db_data.last_modified = db_data.content_hash = None
+            db_data.watermark = None
         for key, value in dict_data.items():
             setattr(db_data, key, value)
         self.session.add(db_data)
@@ -64,6 +68,21 @@ class RSSDatabase:
         await self.session.refresh(db_data)
         return True
 
+    async def update_poll(self, data: RSSItem):
+        """Persist the validators and schedule of a polled item."""
+        self.session.add(data)
+        await self.session.commit()
+
+    async def rescan_all(self):
+        """Forget the validators and watermark of every feed, so the next
+        poll parses them in full."""
+        await self.session.exec(
+            update(RSSItem).values(
+                etag=None, last_modified=None, content_hash=None, watermark=None
+            )
+        )
+        await self.session.commit()
+
     async def search_id(self, _id: int) -> RSSItem | None:
         return await self.session.get(RSSItem, _id)
 
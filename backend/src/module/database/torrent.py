@@ -1,8 +1,15 @@
+from collections import defaultdict
+from itertools import batched
+
 from loguru import logger
+from sqlalchemy.dialects.sqlite import insert
 from sqlmodel import and_, desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from module.models import Torrent
+from module.models import Bangumi, Torrent
+
+# Keep statements well below SQLite's bound parameter limit.
+CHUNK_SIZE = 500
 
 
 class TorrentDatabase:
@@ -23,16 +30,32 @@ class TorrentDatabase:
         logger.debug("Insert {} in database.", result.name)
 
     async def add_all(self, datas: list[Torrent]):
-        for index, data in enumerate(datas):
-            result = (
-                await self.session.exec(select(Torrent).where(Torrent.url == data.url))
-            ).first()
-            if result:
-                for key, value in data.model_dump(exclude_unset=True).items():
-                    setattr(result, key, value)
-                datas[index] = result
-        self.session.add_all(datas)
+        # A url listed twice would hit its own conflict, the last one wins.
+        unique = {data.url: data for data in datas}
+        # Like add(), an existing row only takes the fields that were set, so
+        # upsert torrents grouped by which fields they have set.
+        groups: defaultdict[frozenset[str], list[Torrent]] = defaultdict(list)
+        for data in unique.values():
+            groups[frozenset(data.model_fields_set - {"id"}) | {"url"}].append(data)
+        ids: dict[str, int] = {}
+        for fields, group in groups.items():
+            statement = insert(Torrent)
+            statement = statement.on_conflict_do_update(
+                index_elements=["url"],
+                set_={field: statement.excluded[field] for field in fields},
+            ).returning(Torrent.id, Torrent.url)  # type: ignore[arg-type]
+            # Executed as batched multi-row INSERTs by SQLAlchemy.
+            result = await self.session.exec(
+                statement, params=[data.model_dump() for data in group]
+            )
+            ids.update((url, _id) for _id, url in result)
         await self.session.commit()
+        for data in datas:
+            data.id = ids.get(data.url, data.id)
+        # The upsert bypassed the session, reload torrents it already holds.
+        for held in list(self.session.identity_map.values()):
+            if isinstance(held, Torrent) and held.url in ids:
+                await self.session.refresh(held)
         logger.debug("Insert {} torrents in database.", len(datas))
 
     async def update(self, data: Torrent):
@@ -75,13 +98,15 @@ class TorrentDatabase:
         )
 
     async def check_new(self, torrents_list: list[Torrent]) -> list[Torrent]:
-        new_torrents = []
-        downloaded_torrents = await self.search_all_downloaded()
-        downloaded_url = [t.url for t in downloaded_torrents]
-        for torrent in torrents_list:
-            if torrent.url not in downloaded_url:
-                new_torrents.append(torrent)
-        return new_torrents
+        # Only look up the urls at hand, through the index on torrent.url.
+        downloaded_url: set[str] = set()
+        for urls in batched({t.url for t in torrents_list}, CHUNK_SIZE, strict=False):
+            statement = select(Torrent.url).where(
+                Torrent.downloaded,
+                Torrent.url.in_(urls),  # type: ignore[attr-defined]
+            )
+            downloaded_url.update((await self.session.exec(statement)).all())
+        return [t for t in torrents_list if t.url not in downloaded_url]
 
     async def get_bangumi_id(self, torrent_hash: str) -> int | None:
         return (
@@ -97,6 +122,26 @@ class TorrentDatabase:
             )
         ).first()
 
+    async def get_offsets(self, hashes: list[str]) -> dict[str, tuple[int, int]]:
+        """Resolve torrent hashes to (bangumi_id, offset) in one pass.
+
+        Like get_bangumi_id, the newest torrent row of a hash wins.
+        """
+        offsets: dict[str, tuple[int, int]] = {}
+        for chunk in batched(set(hashes), CHUNK_SIZE, strict=False):
+            statement = (
+                select(Torrent.hash, Torrent.bangumi_id, Bangumi.offset)
+                .outerjoin(Bangumi, Bangumi.id == Torrent.bangumi_id)
+                .where(
+                    Torrent.hash.in_(chunk),  # type: ignore[union-attr, attr-defined]
+                    Torrent.bangumi_id.isnot(None),  # type: ignore[attr-defined, optional-member-access]
+                )
+                .order_by(Torrent.id)
+            )
+            for _hash, bangumi_id, offset in await self.session.exec(statement):
+                offsets[_hash] = (bangumi_id, offset or 0)
+        return offsets
+
     async def delete_by_bangumi_id(self, bangumi_id: int):
         statement = select(Torrent).where(Torrent.bangumi_id == bangumi_id)
         torrents = (await self.session.exec(statement)).all()
@@ -1,3 +1,3 @@
-from .download_client import DownloadClient
+from .download_client import DownloadClient, download_session, expire_download_session
 
-__all__ = ["DownloadClient"]
+__all__ = ["DownloadClient", "download_session", "expire_download_session"]
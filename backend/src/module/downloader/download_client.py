@@ -1,68 +1,218 @@
 import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from loguru import logger
-from qbittorrentapi import Client
-from qbittorrentapi.exceptions import Conflict409Error
-from qbittorrentapi.torrents import TorrentsAddedMetadata, TorrentStatusesT
+from qbittorrentapi.exceptions import (
+    Conflict409Error,
+    Forbidden403Error,
+    Unauthorized401Error,
+)
 
 from module.conf import settings
 from module.models import Bangumi, Torrent
-from module.network import RequestContent
+from module.network import HostLimiter, RequestContent, TorrentFile
 from module.utils import torrent_hash
 
+from .mirror import TorrentMirror
 from .path import TorrentPath
+from .qbittorrent import QbittorrentClient
+
+# .torrent downloads in flight at once while adding torrents.
+FETCH_CONCURRENCY = 8
+
+
+def _new_client() -> QbittorrentClient:
+    return QbittorrentClient(
+        host=settings.downloader.host,
+        username=settings.downloader.username,
+        password=settings.downloader.password,
+        api_key=settings.downloader.api_key,
+        ssl=settings.downloader.ssl,
+    )
+
+
+def _client_key() -> tuple:
+    downloader = settings.downloader
+    return (
+        downloader.host,
+        downloader.username,
+        downloader.password,
+        downloader.api_key,
+        downloader.ssl,
+    )
+
+
+class SharedSession:
+    """Process-wide logged-in client that every DownloadClient borrows.
+
+    Logging in happens once, on first use, and again only when the session
+    expires or the downloader settings change.
+    """
+
+    def __init__(self):
+        self._client: QbittorrentClient | None = None
+        self._key: tuple | None = None
+        self._lock = asyncio.Lock()
+        self.authed = False
+        self.mirror = TorrentMirror()
+
+    async def acquire(self) -> QbittorrentClient:
+        async with self._lock:
+            key = _client_key()
+            if self._client is None or key != self._key:
+                await self._close()
+                self._client, self._key = _new_client(), key
+                self.mirror = TorrentMirror()
+            if not self.authed:
+                await self._client.auth_log_in()
+                self.authed = True
+                logger.debug("[Downloader] Authed.")
+            return self._client
+
+    async def reauth(self, client: QbittorrentClient):
+        async with self._lock:
+            # Another borrower may have logged in again already.
+            if client is self._client and self.authed:
+                self.authed = False
+        await self.acquire()
+
+    async def log_out(self):
+        async with self._lock:
+            await self._close()
+
+    async def _close(self):
+        if self._client is None:
+            return
+        if self.authed:
+            try:
+                await self._client.auth_log_out()
+            except Exception as e:
+                logger.debug("[Downloader] Log out failed: {}", e)
+        await self._client.aclose()
+        self._client = None
+        self.authed = False
+
+
+_session: SharedSession | None = None
+
+
+@asynccontextmanager
+async def download_session() -> AsyncIterator[SharedSession]:
+    """Lend one logged-in client to DownloadClient while the context is active."""
+    global _session
+    session = _session = SharedSession()
+    try:
+        yield session
+    finally:
+        _session = None
+        await session.log_out()
+
+
+async def expire_download_session():
+    """Log the shared session out, the next DownloadClient logs in again."""
+    if _session is not None:
+        await _session.log_out()
 
 
 class DownloadClient(TorrentPath):
     def __init__(self):
         super().__init__()
-        self._client: Client = Client(
-            host=settings.downloader.host,
-            username=settings.downloader.username,
-            password=settings.downloader.password,
-            api_key=settings.downloader.api_key,
-            VERIFY_WEBUI_CERTIFICATE=settings.downloader.ssl,
-            DISABLE_LOGGING_DEBUG_OUTPUT=True,
-            REQUESTS_ARGS={"timeout": (3.1, 10)},
-        )
+        self._client: QbittorrentClient | None = None
+        self._shared: SharedSession | None = None
+        self._mirror: TorrentMirror | None = None
         self.authed = False
 
     async def __aenter__(self):
-        if not self.authed:
-            await self.auth()
+        if _session is not None:
+            self._client = await _session.acquire()
+            self._shared = _session
+            self._mirror = _session.mirror
+            self.authed = True
+        elif not self.authed:
+            if self._client is None:
+                self._client = _new_client()
+            try:
+                await self.auth()
+            except BaseException:
+                await self._close()
+                raise
         else:
             logger.error("[Downloader] Already authed.")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.authed:
-            await asyncio.to_thread(self._client.auth_log_out)
+        if self._shared is not None:
+            # Borrowed: the session stays logged in for the next user.
+            self._shared = None
+            self._client = None
+            self._mirror = None
+            self.authed = False
+        else:
+            await self._close()
+
+    async def _close(self):
+        if self._client is None:
+            return
+        try:
+            if self.authed:
+                await self._client.auth_log_out()
+        finally:
             self.authed = False
+            await self._client.aclose()
+            self._client = None
 
     async def auth(self):
-        await asyncio.to_thread(self._client.auth_log_in)
+        await self._client.auth_log_in()
         self.authed = True
         logger.debug("[Downloader] Authed.")
 
+    async def _call(self, func, /, *args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Unauthorized401Error, Forbidden403Error:
+            # The session expired: older qBittorrent answers 403, newer 401.
+            # A banned IP fails the login again and the error propagates.
+            logger.debug("[Downloader] Session expired, log in again.")
+            if self._shared is not None:
+                await self._shared.reauth(self._client)
+            else:
+                await self.auth()
+            return await func(*args, **kwargs)
+
     async def get_torrent_info(
         self,
         category: str | None = "Bangumi",
-        status_filter: TorrentStatusesT | None = "completed",
+        status_filter: str | None = "completed",
         tag: str | None = None,
         hash: list[str] | str | None = None,
+        save_path: str | None = None,
+        files: bool = False,
     ):
-        return await asyncio.to_thread(
-            self._client.torrents_info,
-            status_filter=status_filter,
+        # Served from the sync/maindata mirror, only changes go over the wire.
+        if self._mirror is None:
+            self._mirror = TorrentMirror()
+        await self._call(self._mirror.sync, self._client)
+        torrents = self._mirror.select(
             category=category,
+            status_filter=status_filter,
             tag=tag,
-            torrent_hashes=hash,
+            hash=hash,
+            save_path=save_path,
         )
+        if files:
+            await self.attach_files(torrents)
+        return torrents
+
+    async def attach_files(self, torrents: list):
+        """Fill in ``files`` of torrents from get_torrent_info."""
+        if torrents:
+            await self._call(self._client.attach_files, torrents)
 
     async def rename_torrent_file(self, _hash, old_path, new_path) -> bool:
         logger.info("{} >> {}", old_path, new_path)
         try:
-            await asyncio.to_thread(
+            await self._call(
                 self._client.torrents_rename_file,
                 torrent_hash=_hash,
                 old_path=old_path,
@@ -74,7 +224,7 @@ class DownloadClient(TorrentPath):
             return False
 
     async def delete_torrent(self, hashes):
-        await asyncio.to_thread(
+        await self._call(
             self._client.torrents_delete, delete_files=True, torrent_hashes=hashes
         )
         logger.info("[Downloader] Remove torrents.")
@@ -83,7 +233,7 @@ class DownloadClient(TorrentPath):
         self, torrent_urls, torrent_files, save_path, category
     ) -> bool:
         try:
-            resp = await asyncio.to_thread(
+            resp = await self._call(
                 self._client.torrents_add,
                 is_paused=False,
                 urls=torrent_urls,
@@ -96,7 +246,7 @@ class DownloadClient(TorrentPath):
             logger.debug("[Downloader] Add torrent response: {}", resp)
             if isinstance(resp, str):
                 return resp == "Ok."
-            if isinstance(resp, TorrentsAddedMetadata):
+            if isinstance(resp, dict):
                 return (
                     resp.get("pending_count", 0) > 0 or resp.get("success_count", 0) > 0
                 )
@@ -134,32 +284,45 @@ class DownloadClient(TorrentPath):
             bangumi.save_path = self._gen_save_path(bangumi)
         if isinstance(torrent, Torrent):
             torrent = [torrent]
+        for t in torrent:
+            t.bangumi_id = bangumi.id
+        # Download the .torrent files side by side, a few per host; a failed
+        # one only drops that torrent.
+        fetched = {}
+        limiter = HostLimiter(FETCH_CONCURRENCY, settings.program.rss_host_concurrency)
+
+        async def fetch(t: Torrent, req: RequestContent):
+            async with limiter.acquire(t.url):
+                try:
+                    fetched[t.url] = await req.get_torrent_or_magnet(t)
+                except Exception as e:
+                    logger.warning("[Downloader] Failed to fetch {}: {}", t.name, e)
+
+        async with RequestContent() as req:
+            await asyncio.gather(
+                *(fetch(t, req) for t in torrent if "magnet" not in t.url)
+            )
+
         torrent_files = []
         torrent_urls = []
-        async with RequestContent() as req:
-            for t in torrent:
-                t.bangumi_id = bangumi.id
-                t.downloaded = True
-                if "magnet" in t.url:
-                    torrent_urls.append(t.url)
-                    t.hash = torrent_hash.from_magnet(t.url)
-                else:
-                    torrent_data = await req.get_torrent_or_magnet(t)
-                    if isinstance(torrent_data, bytes):
-                        torrent_files.append(torrent_data)
-                        t.hash = torrent_hash.from_torrent(torrent_data)
-                    elif isinstance(torrent_data, str):
-                        torrent_urls.append(torrent_data)
-                        t.hash = torrent_hash.from_magnet(torrent_data)
-                    else:
-                        logger.error(
-                            '[Downloader] {} torrent is corrupted; it is recommended to manually add the magnet link to qBittorrent, with the save path: "{}".',
-                            t.name,
-                            bangumi.save_path,
-                        )
-                        t.downloaded = False
-
-        if await self._add_torrents(
+        for t in torrent:
+            t.downloaded = True
+            torrent_data = t.url if "magnet" in t.url else fetched.get(t.url)
+            if isinstance(torrent_data, TorrentFile):
+                torrent_files.append(torrent_data.content)
+                t.hash = torrent_data.info_hash
+            elif isinstance(torrent_data, str):
+                torrent_urls.append(torrent_data)
+                t.hash = torrent_hash.from_magnet(torrent_data)
+            else:
+                logger.error(
+                    '[Downloader] {} torrent is corrupted; it is recommended to manually add the magnet link to qBittorrent, with the save path: "{}".',
+                    t.name,
+                    bangumi.save_path,
+                )
+                t.downloaded = False
+
+        if (torrent_urls or torrent_files) and await self._add_torrents(
             torrent_urls=torrent_urls,
             torrent_files=torrent_files,
             save_path=bangumi.save_path,
@@ -168,10 +331,15 @@ class DownloadClient(TorrentPath):
             logger.debug("[Downloader] Add torrent: {}", bangumi.official_title)
             return True
         else:
+            hashes = [t.hash for t in torrent if t.hash]
+            present = set()
+            if hashes:
+                exists = await self.get_torrent_info(
+                    category=None, status_filter=None, hash=hashes
+                )
+                present = {info.hash for info in exists}
             for t in torrent:
-                if not await self.get_torrent_info(
-                    category=None, status_filter=None, hash=t.hash
-                ):
+                if t.hash not in present:
                     t.downloaded = False
             logger.debug(
                 "[Downloader] Torrent added before: {}", bangumi.official_title
@@ -179,31 +347,27 @@ class DownloadClient(TorrentPath):
             return False
 
     async def move_torrent(self, hashes, location):
-        await asyncio.to_thread(self._client.torrents_set_location, location, hashes)
+        await self._call(self._client.torrents_set_location, location, hashes)
 
     async def get_torrent_path(self, hashes):
-        return (await asyncio.to_thread(self._client.torrents_info, hashes=hashes))[
+        return (await self._call(self._client.torrents_info, torrent_hashes=hashes))[
             0
         ].save_path
 
     async def set_category(self, hashes, category):
         try:
-            await asyncio.to_thread(
-                self._client.torrents_set_category, category, hashes=hashes
-            )
+            await self._call(self._client.torrents_set_category, category, hashes)
         except Conflict409Error:
             logger.warning("[Downloader] Category {} does not exist", category)
-            await asyncio.to_thread(self._client.torrents_createCategory, name=category)
-            await asyncio.to_thread(
-                self._client.torrents_set_category, category, hashes=hashes
-            )
+            await self._call(self._client.torrents_create_category, name=category)
+            await self._call(self._client.torrents_set_category, category, hashes)
 
     async def set_tag(self, hashes, tag):
-        await asyncio.to_thread(
+        await self._call(
             self._client.torrents_add_tags, tags=tag, torrent_hashes=hashes
         )
 
     async def remove_tag(self, hashes, tag):
-        await asyncio.to_thread(
+        await self._call(
             self._client.torrents_remove_tags, tags=tag, torrent_hashes=hashes
         )
@@ -0,0 +1,91 @@
+import asyncio
+
+from loguru import logger
+
+from .qbittorrent import AttrDict, QbittorrentClient
+
+# States the "completed" filter of torrents/info matches: all seeding states.
+# "paused" became "stopped" in qBittorrent 5.0.
+COMPLETED_STATES = frozenset(
+    {
+        "uploading",
+        "stalledUP",
+        "pausedUP",
+        "stoppedUP",
+        "queuedUP",
+        "forcedUP",
+        "checkingUP",
+    }
+)
+
+
+def has_tag(torrent: AttrDict, tag: str) -> bool:
+    tags = [t.strip() for t in torrent.get("tags", "").split(",") if t.strip()]
+    # An empty tag means "untagged", as in torrents/info.
+    return tag in tags if tag else not tags
+
+
+class TorrentMirror:
+    """Local copy of the downloader's torrent list, kept current by
+    ``sync/maindata`` deltas instead of pulling the full list every time.
+    """
+
+    def __init__(self):
+        self.rid = 0
+        self.torrents: dict[str, AttrDict] = {}
+        self._lock = asyncio.Lock()
+
+    def apply(self, data: dict):
+        if data.get("full_update"):
+            self.torrents.clear()
+        for _hash, fields in data.get("torrents", {}).items():
+            # Deltas carry only the fields that changed.
+            self.torrents.setdefault(_hash, AttrDict(hash=_hash)).update(fields)
+        for _hash in data.get("torrents_removed", ()):
+            self.torrents.pop(_hash, None)
+        self.rid = data.get("rid", self.rid)
+
+    async def sync(self, client: QbittorrentClient):
+        async with self._lock:
+            data = await client.sync_maindata(self.rid)
+            self.apply(data)
+            logger.debug(
+                "[Downloader] Torrent mirror at rid {}: {} torrents, {} changed.",
+                self.rid,
+                len(self.torrents),
+                len(data.get("torrents", ())),
+            )
+
+    def select(
+        self,
+        category: str | None = None,
+        status_filter: str | None = None,
+        tag: str | None = None,
+        hash: list[str] | str | None = None,
+        save_path: str | None = None,
+    ) -> list[AttrDict]:
+        """Filter the mirror like torrents/info does, returning copies."""
+        if status_filter not in (None, "all", "completed"):
+            raise ValueError(f"Unsupported status filter: {status_filter}")
+        if hash is None:
+            torrents = self.torrents.values()
+        else:
+            hashes = [hash] if isinstance(hash, str) else hash
+            # qBittorrent keys torrents by lowercase hash.
+            hashes = [h.lower() for h in hashes]
+            torrents = [self.torrents[h] for h in hashes if h in self.torrents]
+        result = []
+        for torrent in torrents:
+            if category is not None and torrent.get("category") != category:
+                continue
+            if (
+                status_filter == "completed"
+                and torrent.get("state") not in COMPLETED_STATES
+            ):
+                continue
+            if tag is not None and not has_tag(torrent, tag):
+                continue
+            if save_path is not None and torrent.get("save_path") != save_path:
+                continue
+            result.append(AttrDict(torrent))
+        return result
@@ -1,3 +1,4 @@
+import hashlib
 import re
 from os import PathLike
 
@@ -29,6 +30,16 @@ class TorrentPath:
                 subtitle_list.append(file_name)
         return media_list, subtitle_list
 
+    @staticmethod
+    def torrent_fingerprint(info) -> str:
+        """Digest of the maindata fields that change with a torrent's files,
+        so it needs no torrents/files call."""
+        fields = ("hash", "name", "size", "content_path", "completion_on", "save_path")
+        digest = hashlib.sha1()
+        for field in fields:
+            digest.update(f"{info.get(field, '')}\0".encode())
+        return digest.hexdigest()
+
     @staticmethod
     def _path_to_bangumi(save_path: PathLike[str] | str):
         # Split save path and download path
@@ -0,0 +1,247 @@
+import asyncio
+from collections.abc import Iterable
+
+import httpx2
+from loguru import logger
+from qbittorrentapi.exceptions import (
+    APIConnectionError,
+    Conflict409Error,
+    Forbidden403Error,
+    HTTP4XXError,
+    HTTP5XXError,
+    InternalServerError500Error,
+    InvalidRequest400Error,
+    LoginFailed,
+    NotFound404Error,
+    Unauthorized401Error,
+    UnsupportedMediaType415Error,
+)
+
+# Same exception types as qbittorrentapi, so callers keep catching them.
+STATUS_ERRORS: dict[int, type[Exception]] = {
+    400: InvalidRequest400Error,
+    401: Unauthorized401Error,
+    403: Forbidden403Error,
+    404: NotFound404Error,
+    409: Conflict409Error,
+    415: UnsupportedMediaType415Error,
+    500: InternalServerError500Error,
+}
+
+# Parallel torrents/files requests when file lists are fetched in bulk.
+FILES_CONCURRENCY = 8
+
+
+class AttrDict(dict):
+    """API object with attribute access, as qbittorrentapi returns them."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _join(values: str | Iterable[str] | None, sep: str = "|") -> str | None:
+    if values is None or isinstance(values, str):
+        return values
+    return sep.join(values)
+
+
+def _form(**fields) -> dict[str, str]:
+    form = {}
+    for key, value in fields.items():
+        if value is None:
+            continue
+        form[key] = ("true" if value else "false") if isinstance(value, bool) else value
+    return form
+
+
+class QbittorrentClient:
+    """Async client for the qBittorrent Web API endpoints AutoBangumi uses.
+
+    Method names and exceptions follow qbittorrentapi.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        username: str = "",
+        password: str = "",
+        api_key: str | None = None,
+        ssl: bool = False,
+    ):
+        if "://" not in host:
+            host = f"{'https' if ssl else 'http'}://{host}"
+        self.username = username
+        self._password = password
+        self._api_key = api_key
+        self._http = httpx2.AsyncClient(
+            base_url=f"{host.rstrip('/')}/api/v2/",
+            verify=ssl,
+            timeout=httpx2.Timeout(10, connect=3.1),
+        )
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx2.Response:
+        try:
+            resp = await self._http.request(method, path, **kwargs)
+        except httpx2.TransportError as e:
+            raise APIConnectionError(f"Failed to connect to qBittorrent: {e}") from e
+        if resp.status_code >= 400:
+            error = STATUS_ERRORS.get(
+                resp.status_code,
+                HTTP5XXError if resp.status_code >= 500 else HTTP4XXError,
+            )
+            raise error(resp.text)
+        return resp
+
+    async def _get(self, path: str, **params) -> httpx2.Response:
+        return await self._request("GET", path, params=_form(**params))
+
+    async def _post(self, path: str, **data) -> httpx2.Response:
+        return await self._request("POST", path, data=_form(**data))
+
+    # Auth
+    async def auth_log_in(self):
+        if self._api_key:
+            # API keys (qBittorrent 5.2+) are sent on every request, there is
+            # no session; check the key with a cheap call.
+            self._http.headers["Authorization"] = f"Bearer {self._api_key}"
+            try:
+                await self.app_version()
+            except (Unauthorized401Error, Forbidden403Error) as e:
+                raise LoginFailed() from e
+            return
+        try:
+            resp = await self._post(
+                "auth/login", username=self.username, password=self._password
+            )
+        except Unauthorized401Error as e:
+            raise LoginFailed() from e
+        # Since 5.1.2 a failed login is a 401; before it was 200 "Fails.".
+        if resp.text not in ("", "Ok."):
+            raise LoginFailed()
+
+    async def auth_log_out(self):
+        if not self._api_key:
+            await self._post("auth/logout")
+
+    async def app_version(self) -> str:
+        return (await self._get("app/version")).text
+
+    # Torrents
+    async def torrents_info(
+        self,
+        status_filter: str | None = None,
+        category: str | None = None,
+        tag: str | None = None,
+        torrent_hashes: str | Iterable[str] | None = None,
+    ) -> list[AttrDict]:
+        resp = await self._get(
+            "torrents/info",
+            filter=status_filter,
+            category=category,
+            tag=tag,
+            hashes=_join(torrent_hashes),
+        )
+        return [AttrDict(torrent) for torrent in resp.json()]
+
+    async def torrents_files(self, torrent_hash: str) -> list[AttrDict]:
+        resp = await self._get("torrents/files", hash=torrent_hash)
+        return [AttrDict(file) for file in resp.json()]
+
+    async def attach_files(self, torrents: list[AttrDict]):
+        """Fill in ``files`` of every torrent, a few requests at a time."""
+        limit = asyncio.Semaphore(FILES_CONCURRENCY)
+
+        async def fetch(torrent: AttrDict):
+            async with limit:
+                torrent["files"] = await self.torrents_files(torrent["hash"])
+
+        await asyncio.gather(*(fetch(torrent) for torrent in torrents))
+
+    async def torrents_add(
+        self,
+        urls: Iterable[str] | None = None,
+        torrent_files: Iterable[bytes] | None = None,
+        save_path: str | None = None,
+        category: str | None = None,
+        is_paused: bool | None = None,
+        use_auto_torrent_management: bool | None = None,
+        content_layout: str | None = None,
+    ) -> str | AttrDict:
+        fields = _form(
+            urls=_join(urls, "\n") or None,
+            savepath=save_path,
+            category=category,
+            # "paused" was renamed "stopped" in qBittorrent 5.0.
+            paused=is_paused,
+            stopped=is_paused,
+            autoTMM=use_auto_torrent_management,
+            contentLayout=content_layout,
+        )
+        # torrents/add only takes multipart bodies, even without files.
+        files = [(key, (None, value)) for key, value in fields.items()]
+        files += [
+            ("torrents", (f"torrent__{i}", content, "application/x-bittorrent"))
+            for i, content in enumerate(torrent_files or ())
+        ]
+        resp = await self._request("POST", "torrents/add", files=files)
+        try:
+            return AttrDict(resp.json())
+        except ValueError:
+            return resp.text
+
+    async def torrents_rename_file(
+        self, torrent_hash: str, old_path: str, new_path: str
+    ):
+        await self._post(
+            "torrents/renameFile", hash=torrent_hash, oldPath=old_path, newPath=new_path
+        )
+
+    async def torrents_delete(
+        self, delete_files: bool, torrent_hashes: str | Iterable[str]
+    ):
+        await self._post(
+            "torrents/delete", hashes=_join(torrent_hashes), deleteFiles=delete_files
+        )
+
+    async def torrents_set_location(
+        self, location: str, torrent_hashes: str | Iterable[str]
+    ):
+        await self._post(
+            "torrents/setLocation", hashes=_join(torrent_hashes), location=location
+        )
+
+    async def torrents_set_category(
+        self, category: str, torrent_hashes: str | Iterable[str]
+    ):
+        await self._post(
+            "torrents/setCategory", hashes=_join(torrent_hashes), category=category
+        )
+
+    async def torrents_create_category(self, name: str, save_path: str | None = None):
+        await self._post("torrents/createCategory", category=name, savePath=save_path)
+
+    async def torrents_add_tags(self, tags: str, torrent_hashes: str | Iterable[str]):
+        await self._post(
+            "torrents/addTags", hashes=_join(torrent_hashes), tags=_join(tags, ",")
+        )
+
+    async def torrents_remove_tags(
+        self, tags: str, torrent_hashes: str | Iterable[str]
+    ):
+        await self._post(
+            "torrents/removeTags", hashes=_join(torrent_hashes), tags=_join(tags, ",")
+        )
+
+    # Sync
+    async def sync_maindata(self, rid: int = 0) -> dict:
+        resp = await self._get("sync/maindata", rid=rid)
+        logger.trace(
+            "[Downloader] sync/maindata rid={} -> {} bytes", rid, len(resp.content)
+        )
+        return resp.json()
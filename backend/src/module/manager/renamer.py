@@ -1,20 +1,40 @@
 import asyncio
 from collections import defaultdict
+from typing import NamedTuple
 
 from loguru import logger
 
 from module.conf import settings
 from module.database import Database
 from module.downloader import DownloadClient
-from module.models import EpisodeFile, Notification, SubtitleFile
+from module.downloader.mirror import has_tag
+from module.models import EpisodeFile, Notification, RenameRecord, SubtitleFile
 from module.parser import TitleParser
 
+# Renames in flight against the downloader at once.
+RENAME_CONCURRENCY = 8
+
+
+class RenameOp(NamedTuple):
+    hash: str
+    old_path: str
+    new_path: str
+    # Sent when the rename of a single episode goes through.
+    notification: Notification | None = None
+    collection: bool = False
+
 
 class Renamer(DownloadClient):
     def __init__(self):
         super().__init__()
         self._parser = TitleParser()
         self.check_pool = {}
+        # Torrents that had a rename attempted or failed to parse this cycle.
+        self._pending: set[str] = set()
+        # Torrents to delete at the end of the cycle (remove_bad_torrent).
+        self._bad: set[str] = set()
+        # Parsed files of this cycle, by (hash, path, named, file_type).
+        self._episodes: dict[tuple, EpisodeFile | SubtitleFile | None] = {}
 
     @staticmethod
     def gen_path(
@@ -48,7 +68,25 @@ class Renamer(DownloadClient):
             logger.error("[Renamer] Unknown rename method: {}", method)
             return file_info.media_path
 
-    async def rename_file(
+    def parse_file(
+        self,
+        _hash: str,
+        torrent_path: str,
+        torrent_name: str | None = None,
+        season: int | None = None,
+        file_type: str = "media",
+    ) -> EpisodeFile | SubtitleFile | None:
+        key = (_hash, torrent_path, torrent_name is not None, file_type)
+        if key not in self._episodes:
+            self._episodes[key] = self._parser.torrent_parser(
+                torrent_path=torrent_path,
+                torrent_name=torrent_name,
+                season=season,
+                file_type=file_type,
+            )
+        return self._episodes[key]
+
+    def plan_file(
         self,
         torrent_name: str,
         media_path: str,
@@ -58,34 +96,23 @@ class Renamer(DownloadClient):
         _hash: str,
         offset: int,
         **kwargs,
-    ):
-        ep = self._parser.torrent_parser(
-            torrent_name=torrent_name,
-            torrent_path=media_path,
-            season=season,
-        )
-        if ep:
-            new_path = self.gen_path(ep, bangumi_name, method=method, offset=offset)
-            if media_path != new_path:
-                if new_path not in self.check_pool.keys():
-                    renamed = await self.rename_torrent_file(
-                        _hash=_hash,
-                        old_path=media_path,
-                        new_path=new_path,
-                    )
-                    if renamed:
-                        return Notification(
-                            official_title=bangumi_name,
-                            season=ep.season,
-                            episode=ep.episode,
-                        )
-        else:
+    ) -> list[RenameOp]:
+        ep = self.parse_file(_hash, media_path, torrent_name, season)
+        if ep is None:
             logger.warning("[Renamer] {} parse failed", media_path)
+            self._pending.add(_hash)
             if settings.bangumi_manage.remove_bad_torrent:
-                await self.delete_torrent(_hash)
-        return None
+                self._bad.add(_hash)
+            return []
+        new_path = self.gen_path(ep, bangumi_name, method=method, offset=offset)
+        if media_path == new_path or new_path in self.check_pool.keys():
+            return []
+        notification = Notification(
+            official_title=bangumi_name, season=ep.season, episode=ep.episode
+        )
+        return [RenameOp(_hash, media_path, new_path, notification=notification)]
 
-    async def rename_collection(
+    def plan_collection(
         self,
         media_list: list[str],
         bangumi_name: str,
@@ -94,31 +121,19 @@ class Renamer(DownloadClient):
         _hash: str,
         offset: int,
         **kwargs,
-    ):
+    ) -> list[RenameOp]:
+        ops = []
         for media_path in media_list:
-            if self.is_ep(media_path):
-                ep = self._parser.torrent_parser(
-                    torrent_path=media_path,
-                    season=season,
-                )
-                if ep:
-                    new_path = self.gen_path(
-                        ep, bangumi_name, method=method, offset=offset
-                    )
-                    if media_path != new_path:
-                        renamed = await self.rename_torrent_file(
-                            _hash=_hash,
-                            old_path=media_path,
-                            new_path=new_path,
-                        )
-                        if not renamed:
-                            logger.warning("[Renamer] {} rename failed", media_path)
-                            # Delete bad torrent.
-                            if settings.bangumi_manage.remove_bad_torrent:
-                                await self.delete_torrent(_hash)
-                                break
+            if not self.is_ep(media_path):
+                continue
+            ep = self.parse_file(_hash, media_path, season=season)
+            if ep:
+                new_path = self.gen_path(ep, bangumi_name, method=method, offset=offset)
+                if media_path != new_path:
+                    ops.append(RenameOp(_hash, media_path, new_path, collection=True))
+        return ops
 
-    async def rename_subtitles(
+    def plan_subtitles(
         self,
         subtitle_list: list[str],
         torrent_name: str,
@@ -128,43 +143,54 @@ class Renamer(DownloadClient):
         _hash: str,
         offset: int,
         **kwargs,
-    ):
+    ) -> list[RenameOp]:
         method = "subtitle_" + method
+        ops = []
         for subtitle_path in subtitle_list:
-            sub = self._parser.torrent_parser(
-                torrent_path=subtitle_path,
-                torrent_name=torrent_name,
-                season=season,
-                file_type="subtitle",
+            sub = self.parse_file(
+                _hash, subtitle_path, torrent_name, season, file_type="subtitle"
             )
             if sub:
                 new_path = self.gen_path(
                     sub, bangumi_name, method=method, offset=offset
                 )
                 if subtitle_path != new_path:
-                    renamed = await self.rename_torrent_file(
-                        _hash=_hash,
-                        old_path=subtitle_path,
-                        new_path=new_path,
-                    )
-                    if not renamed:
-                        logger.warning("[Renamer] {} rename failed", subtitle_path)
+                    ops.append(RenameOp(_hash, subtitle_path, new_path))
+        return ops
+
+    async def run_renames(self, ops: list[RenameOp]) -> list[Notification]:
+        """Send the planned renames, RENAME_CONCURRENCY at a time."""
+        limit = asyncio.Semaphore(RENAME_CONCURRENCY)
+
+        async def run(op: RenameOp) -> Notification | None:
+            async with limit:
+                renamed = await self.rename_torrent_file(
+                    _hash=op.hash, old_path=op.old_path, new_path=op.new_path
+                )
+            if renamed:
+                return op.notification
+            logger.warning("[Renamer] {} rename failed", op.old_path)
+            # A collection that can't be renamed is a bad torrent.
+            if op.collection and settings.bangumi_manage.remove_bad_torrent:
+                self._bad.add(op.hash)
+            return None
+
+        results = await asyncio.gather(*(run(op) for op in ops))
+        return [notification for notification in results if notification]
 
-    async def check_multi_version(self, tag=None):
-        if not settings.bangumi_manage.retain_latest_media_version:
-            return
-        torrents_info = await self.get_torrent_info(tag=tag)
+    async def check_multi_version(self, torrents_info: list) -> set[str]:
+        """Delete all but the latest revision of each episode.
+
+        Returns the hashes of the deleted torrents.
+        """
         grouped_torrents = defaultdict(list)
 
         for torrent_info in torrents_info:
             media_list, _ = self.check_files(torrent_info)
             if len(media_list) == 1:
                 bangumi_name, season = self._path_to_bangumi(torrent_info.save_path)
-                media_path = media_list[0]
-                ep = self._parser.torrent_parser(
-                    torrent_path=media_path,
-                    torrent_name=torrent_info.name,
-                    season=season,
+                ep = self.parse_file(
+                    torrent_info.hash, media_list[0], torrent_info.name, season
                 )
                 if ep is None:
                     continue
@@ -174,6 +200,7 @@ class Renamer(DownloadClient):
         multi_version_torrents = {
             k: v for k, v in grouped_torrents.items() if len(v) > 1
         }
+        deleted: set[str] = set()
 
         for key, torrents in multi_version_torrents.items():
             torrent_hashes = {torrent[0].hash: torrent[0].name for torrent in torrents}
@@ -197,20 +224,69 @@ class Renamer(DownloadClient):
                         "\n\t\t".join(f"- {name}" for name in torrent_hashes.values()),
                     )
                 )
-                await self.delete_torrent(torrent_hashes.keys())
+                deleted.update(torrent_hashes)
+        if deleted:
+            await self.delete_torrent(list(deleted))
+        return deleted
+
+    async def rename_torrent_file(self, _hash, old_path, new_path) -> bool:
+        self._pending.add(_hash)
+        return await super().rename_torrent_file(_hash, old_path, new_path)
 
     async def rename(self, tag="") -> list[Notification]:
         # Get torrent info
         logger.debug("[Renamer] Start rename process.")
-        if tag:
-            await self.check_multi_version(tag=tag)
-        else:
-            await self.check_multi_version()
+        self._episodes.clear()
         rename_method = settings.bangumi_manage.rename_method
-        torrents_info = await self.get_torrent_info(tag=tag)
-        renamed_info: list[Notification] = []
+        # One snapshot per cycle: version pruning looks at every tag, the
+        # rename pass at the requested one ("" means untagged).
+        retain = settings.bangumi_manage.retain_latest_media_version
+        snapshot = await self.get_torrent_info(tag=(tag or None) if retain else tag)
+        hashes = [info.hash for info in snapshot]
+        async with Database() as db:
+            offsets = await db.torrent.get_offsets(hashes)
+            done = await db.rename.search_hashes(hashes)
+        self._pending.clear()
+        self._bad.clear()
+        # Skip what is done before asking for any file lists.
+        checked: dict[str, RenameRecord] = {}
+        for info in snapshot:
+            record = RenameRecord(
+                hash=info.hash,
+                fingerprint=self.torrent_fingerprint(info),
+                offset=offsets.get(info.hash, (None, 0))[1],
+                rename_method=rename_method,
+            )
+            previous = done.get(info.hash)
+            if previous and (
+                previous.fingerprint,
+                previous.offset,
+                previous.rename_method,
+            ) == (record.fingerprint, record.offset, record.rename_method):
+                continue
+            checked[info.hash] = record
+        torrents_info = [info for info in snapshot if info.hash in checked]
+        deleted: set[str] = set()
+        if retain:
+            # Versions are grouped by save path, so only the folders of new
+            # or changed torrents need a look.
+            save_paths = {info.save_path for info in torrents_info}
+            candidates = [info for info in snapshot if info.save_path in save_paths]
+            await self.attach_files(candidates)
+            deleted = await self.check_multi_version(candidates)
+            torrents_info = [
+                info
+                for info in torrents_info
+                if info.hash not in deleted and has_tag(info, tag)
+            ]
+        else:
+            await self.attach_files(torrents_info)
+        ops: list[RenameOp] = []
+        # Tag and category changes go out as one multi-hash call each.
+        tags: defaultdict[str, list[str]] = defaultdict(list)
+        untags: defaultdict[str, list[str]] = defaultdict(list)
+        collections: list[str] = []
         for info in torrents_info:
-            media_list, subtitle_list = self.check_files(info)
             bangumi_name, season = self._path_to_bangumi(info.save_path)
             kwargs = {
                 "torrent_name": info.name,
@@ -218,31 +294,45 @@ class Renamer(DownloadClient):
                 "method": rename_method,
                 "season": season,
                 "_hash": info.hash,
-                "offset": 0,
+                "offset": checked[info.hash].offset,
             }
-            await self.set_tag(info.hash, bangumi_name)
-            async with Database() as db:
-                bangumi_id = await db.torrent.get_bangumi_id(info.hash)
-                if bangumi_id:
-                    kwargs["offset"] = await db.bangumi.get_offset(bangumi_id)
+            media_list, subtitle_list = self.check_files(info)
             # Rename single media file
             if len(media_list) == 1:
-                notify_info = await self.rename_file(media_path=media_list[0], **kwargs)
-                if notify_info:
-                    renamed_info.append(notify_info)
-                # Rename subtitle file
-                if len(subtitle_list) > 0:
-                    await self.rename_subtitles(subtitle_list=subtitle_list, **kwargs)
+                tags[bangumi_name].append(info.hash)
+                ops += self.plan_file(media_path=media_list[0], **kwargs)
+                ops += self.plan_subtitles(subtitle_list=subtitle_list, **kwargs)
             # Rename collection
             elif len(media_list) > 1:
                 logger.info("[Renamer] Start rename collection")
-                await self.rename_collection(media_list=media_list, **kwargs)
-                if len(subtitle_list) > 0:
-                    await self.rename_subtitles(subtitle_list=subtitle_list, **kwargs)
-                await self.set_category(info.hash, "BangumiCollection")
+                tags[bangumi_name].append(info.hash)
+                ops += self.plan_collection(media_list=media_list, **kwargs)
+                ops += self.plan_subtitles(subtitle_list=subtitle_list, **kwargs)
+                collections.append(info.hash)
             else:
                 logger.warning("[Renamer] {} has no media file", info.name)
-                await self.remove_tag(info.hash, bangumi_name)
+                untags[bangumi_name].append(info.hash)
+        for name, tag_hashes in tags.items():
+            if name:
+                await self.set_tag(tag_hashes, name)
+        renamed_info = await self.run_renames(ops)
+        if collections:
+            await self.set_category(collections, "BangumiCollection")
+        for name, tag_hashes in untags.items():
+            if name:
+                await self.remove_tag(tag_hashes, name)
+        if self._bad:
+            await self.delete_torrent(list(self._bad))
+        # Nothing was left to rename: skip these until their files, offset or
+        # the rename method change.
+        # Torrents of other tags count too, they were looked at for pruning.
+        finished = [
+            record
+            for _hash, record in checked.items()
+            if _hash not in self._pending and _hash not in deleted
+        ]
+        async with Database() as db:
+            await db.rename.add_all(finished)
         logger.debug("[Renamer] Rename process finished.")
         return renamed_info
 
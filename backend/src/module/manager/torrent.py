@@ -10,10 +10,10 @@ class TorrentManager(Database):
     @staticmethod
     async def __match_torrents_list(data: Bangumi | BangumiUpdate) -> list:
         async with DownloadClient() as client:
-            torrents = await client.get_torrent_info(status_filter=None)
-        return [
-            torrent.hash for torrent in torrents if torrent.save_path == data.save_path
-        ]
+            torrents = await client.get_torrent_info(
+                status_filter=None, save_path=data.save_path
+            )
+        return [torrent.hash for torrent in torrents]
 
     async def delete_torrents(self, data: Bangumi, client: DownloadClient):
         hash_list = await self.__match_torrents_list(data)
@@ -2,7 +2,7 @@ from .bangumi import Bangumi, BangumiUpdate, Episode, Notification
 from .config import Config
 from .response import APIResponse, ResponseModel
 from .rss import RSSItem, RSSUpdate
-from .torrent import EpisodeFile, SubtitleFile, Torrent, TorrentInfo
+from .torrent import EpisodeFile, RenameRecord, SubtitleFile, Torrent, TorrentInfo
 from .user import User, UserUpdate
 
 __all__ = [
@@ -16,6 +16,7 @@ __all__ = [
     "RSSItem",
     "RSSUpdate",
     "EpisodeFile",
+    "RenameRecord",
     "SubtitleFile",
     "Torrent",
     "TorrentInfo",
@@ -1,11 +1,24 @@
+import re
 from dataclasses import dataclass
 from typing import Annotated
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 from sqlmodel import Field as SQLField
 from sqlmodel import SQLModel
 
 
+def check_filter(value: str) -> str:
+    try:
+        re.compile(value.replace(",", "|"))
+    except re.error as e:
+        raise ValueError(f"Invalid filter {value!r}: {e}") from e
+    return value
+
+
+# Comma separated regexes, rejected before they reach the database.
+RuleFilter = Annotated[str, AfterValidator(check_filter)]
+
+
 class Bangumi(SQLModel, table=True):
     id: Annotated[int | None, SQLField(primary_key=True)] = None
     official_title: Annotated[str, SQLField(title="番剧中文名")] = ""
@@ -19,7 +32,7 @@ class Bangumi(SQLModel, table=True):
     subtitle: Annotated[str | None, SQLField(title="字幕")] = None
     eps_collect: Annotated[bool, SQLField(title="是否已收集")] = False
     offset: Annotated[int, SQLField(title="番剧偏移量")] = 0
-    filter: Annotated[str, SQLField(title="番剧过滤器")] = "720,\\d+-\\d+"
+    filter: Annotated[RuleFilter, SQLField(title="番剧过滤器")] = "720,\\d+-\\d+"
     rss_link: Annotated[str, SQLField(title="番剧RSS链接")] = ""
     poster_link: Annotated[str | None, SQLField(title="番剧海报链接")] = None
     added: Annotated[bool, SQLField(title="是否已添加")] = False
@@ -40,7 +53,7 @@ class BangumiUpdate(SQLModel):
     subtitle: Annotated[str | None, SQLField(title="字幕")] = None
     eps_collect: Annotated[bool, SQLField(title="是否已收集")] = False
     offset: Annotated[int, SQLField(title="番剧偏移量")] = 0
-    filter: Annotated[str, SQLField(title="番剧过滤器")] = "720,\\d+-\\d+"
+    filter: Annotated[RuleFilter, SQLField(title="番剧过滤器")] = "720,\\d+-\\d+"
     rss_link: Annotated[str, SQLField(title="番剧RSS链接")] = ""
     poster_link: Annotated[str | None, SQLField(title="番剧海报链接")] = None
     added: Annotated[bool, SQLField(title="是否已添加")] = False
@@ -57,6 +70,9 @@ class Notification(BaseModel):
 
 
 class Episode(BaseModel):
+    # Parsed titles are cached and shared, see raw_parser.
+    model_config = ConfigDict(frozen=True)
+
     title_en: str | None
     title_zh: str | None
     title_jp: str | None
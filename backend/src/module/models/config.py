@@ -15,6 +15,12 @@ class Program(BaseModel):
     rss_time: Annotated[int, Field(description="Sleep time")] = 900
     rename_time: Annotated[int, Field(description="Rename times in one loop")] = 60
     webui_port: Annotated[int, Field(description="WebUI port")] = 7892
+    rss_concurrency: Annotated[
+        int, Field(ge=1, description="Max RSS feeds fetched in parallel")
+    ] = 8
+    rss_host_concurrency: Annotated[
+        int, Field(ge=1, description="Max parallel RSS requests per host")
+    ] = 2
 
 
 class Downloader(BaseModel):
@@ -53,6 +59,15 @@ class RSSParser(BaseModel):
     ]
     language: str = "zh"
 
+    @field_validator("filter")
+    @classmethod
+    def validate_filter(cls, value: list[str]) -> list[str]:
+        try:
+            re.compile("|".join(value))
+        except re.error as e:
+            raise ValueError(f"Invalid RSS filter: {e}") from e
+        return value
+
 
 class BangumiManage(BaseModel):
     enable: Annotated[bool, Field(description="Enable bangumi manage")] = True
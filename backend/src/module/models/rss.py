@@ -10,6 +10,15 @@ class RSSItem(SQLModel, table=True):
     aggregate: bool = False
     parser: str = "mikan"
     enabled: bool = True
+    # Validators of the last processed response, used for conditional polling.
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+    # Url of the newest item already processed, parsing stops when it shows up.
+    watermark: str | None = None
+    # Adaptive polling: current interval in seconds and next due unix time.
+    poll_interval: int | None = None
+    next_poll: float | None = None
 
 
 class RSSUpdate(SQLModel):
@@ -10,10 +10,22 @@ class Torrent(SQLModel, table=True):
     bangumi_id: Annotated[int | None, SQLField(foreign_key="bangumi.id")] = None
     rss_id: int | None = None
     name: str = ""
-    url: str = ""
+    url: Annotated[str, SQLField(index=True, unique=True)] = ""
     homepage: str | None = None
     downloaded: bool = False
-    hash: str | None = None
+    hash: Annotated[str | None, SQLField(index=True)] = None
+
+
+class RenameRecord(SQLModel, table=True):
+    """A torrent the Renamer has nothing left to do for, as long as its
+    fingerprint (see TorrentPath.torrent_fingerprint), offset and rename
+    method stay the same."""
+
+    id: Annotated[int | None, SQLField(primary_key=True)] = None
+    hash: Annotated[str, SQLField(index=True, unique=True)] = ""
+    fingerprint: str = ""
+    offset: int = 0
+    rename_method: str = ""
 
 
 class EpisodeFile(BaseModel):
@@ -1,3 +1,14 @@
-from .request_contents import RequestContent
+from .json_cache import JSONCache
+from .limiter import HostLimiter
+from .request_contents import FeedParser, FeedResult, RequestContent, TorrentFile
+from .request_url import http_pool
 
-__all__ = ["RequestContent"]
+__all__ = [
+    "FeedParser",
+    "FeedResult",
+    "HostLimiter",
+    "JSONCache",
+    "RequestContent",
+    "TorrentFile",
+    "http_pool",
+]
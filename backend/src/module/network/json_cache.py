@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from loguru import logger
+
+from module.utils.atomic_write import atomic_write
+
+from .request_contents import RequestContent
+
+Fetch = Callable[[RequestContent], Awaitable[dict | None]]
+
+DAY = 24 * 3600
+
+
+class JSONCache:
+    """On-disk cache of JSON API responses.
+
+    Entries are fresh for ``ttl`` seconds, or ``negative_ttl`` for answers
+    ``is_negative`` calls empty. Past that and up to ``max_stale`` they are
+    still served while a background request refreshes them. Failed requests
+    are never stored.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        ttl: float = 7 * DAY,
+        negative_ttl: float = DAY,
+        max_stale: float = 30 * DAY,
+        is_negative: Callable[[dict], bool] = lambda data: not data,
+    ):
+        self.root = root
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale
+        self.is_negative = is_negative
+        self._refreshing: dict[Path, asyncio.Task] = {}
+
+    def _path(self, key: tuple) -> Path:
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode())
+        return self.root / f"{digest.hexdigest()}.json"
+
+    def _read(self, path: Path) -> dict | None:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except OSError, ValueError:
+            return None
+
+    def _write(self, path: Path, data: dict):
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = {"fetched": time.time(), "data": data}
+        atomic_write(path, lambda f: json.dump(entry, f, ensure_ascii=False))
+
+    async def _fetch(self, path: Path, fetch: Fetch, req: RequestContent):
+        data = await fetch(req)
+        if data is not None:
+            try:
+                await asyncio.to_thread(self._write, path, data)
+            except OSError as e:
+                logger.debug("[Cache] Cannot write {}: {}", path.name, e)
+        return data
+
+    async def _revalidate(self, path: Path, fetch: Fetch):
+        try:
+            async with RequestContent() as req:
+                await self._fetch(path, fetch, req)
+        finally:
+            self._refreshing.pop(path, None)
+
+    def forget(self, key: tuple):
+        self._path(key).unlink(missing_ok=True)
+
+    async def get(self, key: tuple, fetch: Fetch, req: RequestContent) -> dict | None:
+        """Answer ``key`` from disk, calling ``fetch(req)`` when it has to."""
+        path = self._path(key)
+        entry = await asyncio.to_thread(self._read, path)
+        if entry is None:
+            return await self._fetch(path, fetch, req)
+        data = entry["data"]
+        age = time.time() - entry["fetched"]
+        if age < (self.negative_ttl if self.is_negative(data) else self.ttl):
+            return data
+        if age < self.max_stale:
+            if path not in self._refreshing:
+                self._refreshing[path] = asyncio.create_task(
+                    self._revalidate(path, fetch)
+                )
+            return data
+        # Too old to trust; still better than nothing if the request fails.
+        fresh = await self._fetch(path, fetch, req)
+        return data if fresh is None else fresh
@@ -0,0 +1,23 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+
+class HostLimiter:
+    """Bound concurrent requests in total and per host."""
+
+    def __init__(self, limit: int, per_host: int):
+        self._total = asyncio.Semaphore(max(limit, 1))
+        self._per_host = max(per_host, 1)
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def acquire(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc
+        host_slot = self._hosts.get(host)
+        if host_slot is None:
+            host_slot = self._hosts[host] = asyncio.Semaphore(self._per_host)
+        # Take the host slot first so a busy host doesn't hold global slots.
+        async with host_slot, self._total:
+            yield
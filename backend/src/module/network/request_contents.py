@@ -1,17 +1,157 @@
-import re
+import email.utils
+import hashlib
+import time
 import xml.etree.ElementTree
+from collections.abc import AsyncIterator, Container
+from dataclasses import dataclass
+from typing import NamedTuple
 
 import httpx2
 import lxml.etree as etree
 from loguru import logger
 
 from module.conf import settings
-from module.models import Torrent
-from module.utils import check_torrent
+from module.models import RSSItem, Torrent
+from module.utils.bencode import scan_torrent
+from module.utils.rule_filter import compile_filter
+from module.utils.torrent_cache import torrent_cache
 
 from .request_url import RequestURL
 from .site import rss_parser
 
+THROTTLED_STATUS = {
+    httpx2.codes.TOO_MANY_REQUESTS,
+    httpx2.codes.SERVICE_UNAVAILABLE,
+}
+
+
+class TorrentFile(NamedTuple):
+    """A downloaded .torrent payload, validated and hashed once."""
+
+    content: bytes
+    valid: bool
+    info_hash: str | None = None
+
+
+@dataclass
+class FeedResult:
+    """Outcome of a conditional RSS poll.
+
+    ``torrents`` is None when there is nothing to process: the server
+    answered 304, the body is byte for byte the one seen last time, or the
+    poll failed (``error``). The validators and the watermark (url of the
+    newest item) are the ones to store once the torrents have been
+    processed; ``ttl`` and ``retry_after`` are the
+    server's polling hints in minutes and seconds.
+    """
+
+    torrents: list[Torrent] | None
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+    watermark: str | None = None
+    ttl: int | None = None
+    retry_after: int | None = None
+    error: bool = False
+
+    @property
+    def unchanged(self) -> bool:
+        return self.torrents is None and not self.error
+
+    @classmethod
+    def failed(cls, rss: RSSItem, retry_after: int | None = None) -> FeedResult:
+        return cls(
+            None,
+            rss.etag,
+            rss.last_modified,
+            rss.content_hash,
+            rss.watermark,
+            retry_after=retry_after,
+            error=True,
+        )
+
+
+def parse_retry_after(value: str | None) -> int | None:
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except TypeError, ValueError:
+        return None
+    return max(int(when.timestamp() - time.time()), 0)
+
+
+class FeedParser:
+    """Incremental RSS parser fed with the response body chunk by chunk.
+
+    Each ``<item>`` becomes a Torrent as soon as its closing tag arrives and
+    is then dropped from the tree, so memory stays bounded by one item.
+    Parsing stops (``done``) once ``limit`` torrents are collected or an item
+    whose url is in ``known`` shows up, which for newest-first feeds means
+    everything after it has been seen already.
+    """
+
+    def __init__(
+        self,
+        _filter: str | None = None,
+        limit: int | None = None,
+        known: Container[str] = (),
+    ):
+        if _filter is None:
+            _filter = "|".join(settings.rss_parser.filter)
+        self._filter = compile_filter(_filter)
+        self._limit = limit
+        self._known = known
+        self._parser = etree.XMLPullParser(events=("end",), tag=("item", "ttl"))
+        self.ttl: int | None = None
+        self.newest: str | None = None
+        self.count = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[Torrent]:
+        if self.done:
+            return []
+        self._parser.feed(chunk)
+        return self._read()
+
+    def close(self) -> list[Torrent]:
+        if self.done:
+            return []
+        self._parser.close()
+        torrents = self._read()
+        self.done = True
+        return torrents
+
+    def _read(self) -> list[Torrent]:
+        torrents: list[Torrent] = []
+        for _, elem in self._parser.read_events():
+            parent = elem.getparent()
+            if parent is None or parent.tag != "channel":
+                continue
+            if elem.tag == "ttl":
+                if elem.text and elem.text.strip().isdigit():
+                    self.ttl = int(elem.text)
+                continue
+            if self.done:
+                continue
+            _title, torrent_url, homepage = rss_parser(elem)
+            parent.remove(elem)
+            if self.newest is None:
+                self.newest = torrent_url
+            if torrent_url in self._known:
+                self.done = True
+                continue
+            if self._filter is None or self._filter.search(_title) is None:
+                torrents.append(
+                    Torrent(name=_title, url=torrent_url, homepage=homepage)
+                )
+                self.count += 1
+                if isinstance(self._limit, int) and self.count >= self._limit:
+                    self.done = True
+        return torrents
+
 
 class RequestContent(RequestURL):
     async def get_torrents(
@@ -21,26 +161,102 @@ class RequestContent(RequestURL):
         limit: int | None = None,
         retry: int = 3,
     ) -> list[Torrent]:
-        soup = await self.get_xml(_url, retry)
-        if soup is not None:
-            torrent_titles, torrent_urls, torrent_homepage = rss_parser(soup)
+        return [
+            torrent
+            async for torrent in self.stream_torrents(_url, _filter, limit, retry=retry)
+        ]
+
+    async def stream_torrents(
+        self,
+        _url: str,
+        _filter: str | None = None,
+        limit: int | None = None,
+        known: Container[str] = (),
+        retry: int = 3,
+    ) -> AsyncIterator[Torrent]:
+        async with self.stream_url(_url, retry) as req:
+            if req is None:
+                logger.warning("[Network] Failed to get torrents: {}", _url)
+                return
+            parser = FeedParser(_filter, limit, known)
+            try:
+                async for chunk in req.aiter_bytes():
+                    for torrent in parser.feed(chunk):
+                        yield torrent
+                    if parser.done:
+                        return
+            except httpx2.RequestError as e:
+                # The items parsed so far are complete, end the feed there.
+                logger.warning("[Network] Failed to read torrents from {}: {}", _url, e)
+                return
+            for torrent in parser.close():
+                yield torrent
+
+    async def poll_torrents(
+        self,
+        rss: RSSItem,
+        _filter: str | None = None,
+        limit: int | None = None,
+        retry: int = 3,
+        force: bool = False,
+    ) -> FeedResult:
+        """Poll ``rss`` and parse the items newer than its watermark.
+
+        ``force`` skips the validators and the watermark and parses the whole
+        feed, which picks up again items the filter rejected before.
+        """
+        headers = {}
+        known = set()
+        if not force:
+            if rss.etag:
+                headers["If-None-Match"] = rss.etag
+            if rss.last_modified:
+                headers["If-Modified-Since"] = rss.last_modified
+            if rss.watermark:
+                known.add(rss.watermark)
+        async with self.stream_url(
+            rss.url,
+            retry,
+            headers=headers,
+            passthrough=THROTTLED_STATUS | {httpx2.codes.NOT_MODIFIED},
+        ) as req:
+            if req is None:
+                logger.warning("[Network] Failed to get torrents: {}", rss.url)
+                return FeedResult.failed(rss)
+            if req.status_code in THROTTLED_STATUS:
+                retry_after = parse_retry_after(req.headers.get("retry-after"))
+                logger.warning(
+                    "[Network] {} asked to slow down (HTTP {}), retry after {}s",
+                    rss.url,
+                    req.status_code,
+                    retry_after,
+                )
+                return FeedResult.failed(rss, retry_after)
+            if req.status_code == httpx2.codes.NOT_MODIFIED:
+                return FeedResult(
+                    None, rss.etag, rss.last_modified, rss.content_hash, rss.watermark
+                )
+            # The whole body is still hashed to recognise an identical
+            # response, but parsing stops as soon as the parser is done.
+            digest = hashlib.sha1()
+            parser = FeedParser(_filter, limit, known)
             torrents: list[Torrent] = []
-            if _filter is None:
-                _filter = "|".join(settings.rss_parser.filter)
-            for _title, torrent_url, homepage in zip(
-                torrent_titles, torrent_urls, torrent_homepage, strict=True
-            ):
-                if re.search(_filter, _title) is None:
-                    torrents.append(
-                        Torrent(name=_title, url=torrent_url, homepage=homepage)
-                    )
-                if isinstance(limit, int):
-                    if len(torrents) >= limit:
-                        break
-            return torrents
-        else:
-            logger.warning("[Network] Failed to get torrents: {}", _url)
-            return []
+            async for chunk in req.aiter_bytes():
+                digest.update(chunk)
+                torrents += parser.feed(chunk)
+            torrents += parser.close()
+            result = FeedResult(
+                None,
+                req.headers.get("etag"),
+                req.headers.get("last-modified"),
+                digest.hexdigest(),
+                parser.newest or rss.watermark,
+            )
+        if not force and result.content_hash == rss.content_hash:
+            return result
+        result.ttl = parser.ttl
+        result.torrents = torrents
+        return result
 
     async def get_xml(
         self, _url, retry: int = 3
@@ -94,12 +310,26 @@ class RequestContent(RequestURL):
         if magnet:
             return magnet[0]
 
-    async def get_torrent_or_magnet(self, torrent: Torrent) -> bytes | str | None:
-        content = await self.get_content(torrent.url)
+    async def get_torrent(self, _url) -> TorrentFile | None:
+        """Download a .torrent file, or read it back from the local cache."""
+        cached = await torrent_cache.get(_url)
+        if cached is not None:
+            content, info_hash = cached
+            return TorrentFile(content, True, info_hash)
+        content = await self.get_content(_url)
         if content is None:
             return None
-        if check_torrent(content):
-            return content
+        scan = scan_torrent(content)
+        if scan.valid and scan.info_hash:
+            await torrent_cache.put(_url, content, scan.info_hash)
+        return TorrentFile(content, scan.valid, scan.info_hash)
+
+    async def get_torrent_or_magnet(self, torrent: Torrent) -> TorrentFile | str | None:
+        torrent_file = await self.get_torrent(torrent.url)
+        if torrent_file is None:
+            return None
+        if torrent_file.valid:
+            return torrent_file
         if torrent.homepage:
             magnet = await self.get_magnet(torrent.homepage)
             if magnet:
@@ -1,4 +1,6 @@
 import asyncio
+from collections.abc import AsyncIterator, Collection
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
 from typing import Self
 
 import httpx2
@@ -7,11 +9,85 @@ from loguru import logger
 from module.conf import settings
 from module.utils.proxy import build_proxy_url
 
+from .limiter import HostLimiter
+
+DEFAULT_HEADERS = {"user-agent": "Mozilla/5.0", "Accept": "application/xml"}
+
+POOL_MAX_CONNECTIONS = 64
+POOL_MAX_PER_HOST = 8
+POOL_KEEPALIVE_EXPIRY = 60
+
+
+def _proxy_url() -> str | None:
+    return build_proxy_url() if settings.proxy.enable else None
+
+
+def _new_client(proxy: str | None, **kwargs) -> httpx2.AsyncClient:
+    return httpx2.AsyncClient(
+        headers=DEFAULT_HEADERS, http2=True, proxy=proxy, timeout=5, **kwargs
+    )
+
+
+class SharedPool:
+    """Process-wide keep-alive client that every RequestURL borrows."""
+
+    def __init__(self):
+        self.limiter = HostLimiter(POOL_MAX_CONNECTIONS, POOL_MAX_PER_HOST)
+        self._client: httpx2.AsyncClient | None = None
+        self._proxy: str | None = None
+        self._retired: list[httpx2.AsyncClient] = []
+
+    @property
+    def client(self) -> httpx2.AsyncClient:
+        proxy = _proxy_url()
+        if self._client is None or proxy != self._proxy:
+            # Proxy settings changed: requests in flight keep the old client,
+            # which is closed together with the pool.
+            if self._client is not None:
+                self._retired.append(self._client)
+            self._client = _new_client(
+                proxy,
+                limits=httpx2.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_CONNECTIONS,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._proxy = proxy
+        return self._client
+
+    async def aclose(self):
+        clients = [*self._retired, self._client]
+        self._client = None
+        self._retired.clear()
+        for client in clients:
+            if client is not None:
+                await client.aclose()
+
+
+_pool: SharedPool | None = None
+
+
+@asynccontextmanager
+async def http_pool() -> AsyncIterator[SharedPool]:
+    """Keep one pooled client open for RequestURL while the context is active."""
+    global _pool
+    pool = _pool = SharedPool()
+    logger.debug("[Network] HTTP connection pool opened.")
+    try:
+        yield pool
+    finally:
+        _pool = None
+        await pool.aclose()
+        logger.debug("[Network] HTTP connection pool closed.")
+
 
 class RequestURL:
     def __init__(self):
-        self.headers = {"user-agent": "Mozilla/5.0", "Accept": "application/xml"}
+        self.headers = dict(DEFAULT_HEADERS)
         self._client: httpx2.AsyncClient | None = None
+        self._limiter: HostLimiter | None = None
+        self._owned = False
 
     @property
     def session(self) -> httpx2.AsyncClient:
@@ -20,27 +96,48 @@ class RequestURL:
         return self._client
 
     async def __aenter__(self) -> Self:
-        proxy = build_proxy_url() if settings.proxy.enable else None
-        self._client = httpx2.AsyncClient(
-            headers=self.headers, http2=True, proxy=proxy, timeout=5
-        )
+        if _pool is not None:
+            self._client = _pool.client
+            self._limiter = _pool.limiter
+            self._owned = False
+        else:
+            self._client = _new_client(_proxy_url())
+            self._owned = True
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._client is not None:
+        if self._client is not None and self._owned:
             await self._client.aclose()
-            self._client = None
+        self._client = None
+        self._limiter = None
+
+    def _slot(self, url) -> AbstractAsyncContextManager:
+        if self._limiter is None:
+            return nullcontext()
+        return self._limiter.acquire(str(url))
 
-    async def get_url(self, url, retry=3):
+    async def get_url(
+        self,
+        url,
+        retry=3,
+        headers: dict | None = None,
+        passthrough: Collection[int] = (),
+    ):
         try_time = 0
         while True:
             try:
-                req = await self.session.get(url=url)
+                async with self._slot(url):
+                    req = await self.session.get(
+                        url=url, headers={**self.headers, **(headers or {})}
+                    )
                 logger.debug(
                     "[Network] Successfully connected to {}. Status: {}",
                     url,
                     req.status_code,
                 )
+                # Statuses the caller wants to inspect itself (304, 429, ...).
+                if req.status_code in passthrough:
+                    return req
                 req.raise_for_status()
                 return req
             except httpx2.RequestError:
@@ -57,11 +154,57 @@ class RequestURL:
         )
         return None
 
+    @asynccontextmanager
+    async def stream_url(
+        self,
+        url,
+        retry=3,
+        headers: dict | None = None,
+        passthrough: Collection[int] = (),
+    ) -> AsyncIterator[httpx2.Response | None]:
+        """Like get_url, but leave the body unread for the caller to iterate."""
+        request = self.session.build_request(
+            "GET", url, headers={**self.headers, **(headers or {})}
+        )
+        for try_time in range(1, retry + 1):
+            async with self._slot(url):
+                try:
+                    req = await self.session.send(request, stream=True)
+                except httpx2.RequestError:
+                    logger.debug(
+                        "[Network] Cannot connect to {}. Wait for 5 seconds.", url
+                    )
+                else:
+                    try:
+                        logger.debug(
+                            "[Network] Successfully connected to {}. Status: {}",
+                            url,
+                            req.status_code,
+                        )
+                        if req.is_error and req.status_code not in passthrough:
+                            logger.debug(
+                                "[Network] {} returned {}", url, req.status_code
+                            )
+                            break
+                        yield req
+                        return
+                    finally:
+                        await req.aclose()
+            if try_time < retry:
+                await asyncio.sleep(5)
+        logger.error(
+            "[Network] Unable to connect to {}, Please check your network settings", url
+        )
+        yield None
+
     async def post_url(self, url: str, data: dict, retry=3):
         try_time = 0
         while True:
             try:
-                req = await self.session.post(url=url, data=data)
+                async with self._slot(url):
+                    req = await self.session.post(
+                        url=url, data=data, headers=self.headers
+                    )
                 req.raise_for_status()
                 return req
             except httpx2.RequestError:
@@ -81,7 +224,10 @@ class RequestURL:
 
     async def post_form(self, url: str, data: dict, files):
         try:
-            req = await self.session.post(url=url, data=data, files=files)
+            async with self._slot(url):
+                req = await self.session.post(
+                    url=url, data=data, files=files, headers=self.headers
+                )
             req.raise_for_status()
             return req
         except httpx2.RequestError:
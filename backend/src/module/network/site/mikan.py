@@ -1,17 +1,10 @@
-def rss_parser(soup):
-    torrent_titles = []
-    torrent_urls = []
-    torrent_homepage = []
-    for item in soup.findall("./channel/item"):
-        torrent_titles.append(item.find("title").text)
-        enclosure = item.find("enclosure")
-        if enclosure is not None:
-            torrent_homepage.append(item.find("link").text)
-            torrent_urls.append(enclosure.attrib.get("url"))
-        else:
-            torrent_urls.append(item.find("link").text)
-            torrent_homepage.append("")
-    return torrent_titles, torrent_urls, torrent_homepage
+def rss_parser(item) -> tuple[str, str, str]:
+    """Title, torrent url and homepage of one ``<item>``."""
+    title = item.find("title").text
+    enclosure = item.find("enclosure")
+    if enclosure is not None:
+        return title, enclosure.attrib.get("url"), item.find("link").text
+    return title, item.find("link").text, ""
 
 
 def mikan_title(soup):
@@ -1,6 +1,6 @@
 from .mikan_parser import mikan_parser
 from .openai import OpenAIParser
-from .raw_parser import raw_parser
+from .raw_parser import raw_parser, raw_parser_cache_info
 from .tmdb_parser import tmdb_parser
 from .torrent_parser import torrent_name_parser, torrent_parser
 
@@ -8,6 +8,7 @@ __all__ = [
     "mikan_parser",
     "OpenAIParser",
     "raw_parser",
+    "raw_parser_cache_info",
     "tmdb_parser",
     "torrent_name_parser",
     "torrent_parser",
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 from loguru import logger
 
@@ -13,7 +14,25 @@ RESOLUTION_RE = re.compile(r"1080|720|2160|4K")
 SOURCE_RE = re.compile(r"B-Global|[Bb]aha|[Bb]ilibili|AT-X|Web")
 SUB_RE = re.compile(r"[简繁日字幕]|CH|BIG5|GB")
 
+# Distinct titles whose parse results are kept.
+RAW_PARSER_CACHE_SIZE = 4096
+# Distinct group names and tags compiled by ``enclosed``.
+ENCLOSED_CACHE_SIZE = 1024
+
 PREFIX_RE = re.compile(r"[^\w\s\u4e00-\u9fff\u3040-\u309f\u30a0-\u30ff-]")
+BRACKET_RE = re.compile(r"[\[\]]")
+SEASON_RE = re.compile(r"S\d{1,2}|Season \d{1,2}|[第].[季期]")
+SEASON_PREFIX_RE = re.compile(r"Season|S")
+SEASON_CN_RE = re.compile(r"[第 ].*[季期(部分)]|部分")
+SEASON_CN_STRIP_RE = re.compile(r"[第季期 ]")
+REGION_RE = re.compile(r"[(（]仅限港澳台地区[）)]")
+NAME_SPLIT_RE = re.compile(r"/|\s{2}|-\s{2}")
+LEADING_ZH_RE = re.compile(r"[\u4e00-\u9fa5]{2,}")
+JP_RE = re.compile(r"[\u0800-\u4e00]{2,}")
+ZH_RE = re.compile(r"[\u4e00-\u9fa5]{2,}")
+EN_RE = re.compile(r"[a-zA-Z]{3,}")
+TAG_SPLIT_RE = re.compile(r"[\[\]()（）]")
+SUB_SUFFIX_RE = re.compile(r"_MP4|_MKV")
 
 CHINESE_NUMBER_MAP = {
     "一": 1,
@@ -30,22 +49,25 @@ CHINESE_NUMBER_MAP = {
 
 
 def get_group(name: str) -> str:
-    return re.split(r"[\[\]]", name)[1]
+    return BRACKET_RE.split(name)[1]
+
+
+@lru_cache(maxsize=ENCLOSED_CACHE_SIZE)
+def enclosed(text: str) -> re.Pattern:
+    """``text`` with one character on either side, matched literally."""
+    return re.compile(f".{re.escape(text)}.")
 
 
 def prefix_process(raw: str, group: str) -> str:
-    raw = re.sub(f".{group}.", "", raw)
+    raw = enclosed(group).sub("", raw)
     raw_process = PREFIX_RE.sub("/", raw)
-    arg_group = raw_process.split("/")
-    while "" in arg_group:
-        arg_group.remove("")
+    arg_group = [arg for arg in raw_process.split("/") if arg]
     if len(arg_group) == 1:
         arg_group = arg_group[0].split(" ")
     for arg in arg_group:
-        if re.search(r"新番|月?番", arg) and len(arg) <= 5:
-            raw = re.sub(f".{arg}.", "", raw)
-        elif re.search(r"港澳台地区", arg):
-            raw = re.sub(f".{arg}.", "", raw)
+        # 「新番」「月番」 tags and region notes
+        if ("番" in arg and len(arg) <= 5) or "港澳台地区" in arg:
+            raw = enclosed(arg).sub("", raw)
     return raw
 
 
@@ -55,19 +77,18 @@ def season_process(season_info: str):
     #     name_season = re.sub(".*新番.", "", season_info)
     #     # 去除「新番」信息
     # name_season = re.sub(r"^[^]】]*[]】]", "", name_season).strip()
-    season_rule = r"S\d{1,2}|Season \d{1,2}|[第].[季期]"
-    name_season = re.sub(r"[\[\]]", " ", name_season)
-    seasons = re.findall(season_rule, name_season)
+    name_season = BRACKET_RE.sub(" ", name_season)
+    seasons = SEASON_RE.findall(name_season)
     if not seasons:
         return name_season, "", 1
-    name = re.sub(season_rule, "", name_season)
+    name = SEASON_RE.sub("", name_season)
     for season in seasons:
         season_raw = season
-        if re.search(r"Season|S", season) is not None:
-            season = int(re.sub(r"Season|S", "", season))
+        if "S" in season:
+            season = int(SEASON_PREFIX_RE.sub("", season))
             break
-        elif re.search(r"[第 ].*[季期(部分)]|部分", season) is not None:
-            season_pro = re.sub(r"[第季期 ]", "", season)
+        elif SEASON_CN_RE.search(season) is not None:
+            season_pro = SEASON_CN_STRIP_RE.sub("", season)
             try:
                 season = int(season_pro)
             except ValueError:
@@ -79,35 +100,33 @@ def season_process(season_info: str):
 def name_process(name: str):
     name_en, name_zh, name_jp = None, None, None
     name = name.strip()
-    name = re.sub(r"[(（]仅限港澳台地区[）)]", "", name)
-    split = re.split(r"/|\s{2}|-\s{2}", name)
-    while "" in split:
-        split.remove("")
+    name = REGION_RE.sub("", name)
+    split = [item for item in NAME_SPLIT_RE.split(name) if item]
     if len(split) == 1:
-        if re.search("_{1}", name) is not None:
-            split = re.split("_", name)
-        elif re.search(" - {1}", name) is not None:
-            split = re.split("-", name)
+        if "_" in name:
+            split = name.split("_")
+        elif " - " in name:
+            split = name.split("-")
     if len(split) == 1:
         split_space = split[0].split(" ")
         for idx in [0, -1]:
-            if re.search(r"^[\u4e00-\u9fa5]{2,}", split_space[idx]) is not None:
+            if LEADING_ZH_RE.match(split_space[idx]) is not None:
                 chs = split_space[idx]
                 split_space.remove(chs)
                 split = [chs, " ".join(split_space)]
                 break
     for item in split:
-        if re.search(r"[\u0800-\u4e00]{2,}", item) and not name_jp:
+        if JP_RE.search(item) and not name_jp:
             name_jp = item.strip()
-        elif re.search(r"[\u4e00-\u9fa5]{2,}", item) and not name_zh:
+        elif ZH_RE.search(item) and not name_zh:
             name_zh = item.strip()
-        elif re.search(r"[a-zA-Z]{3,}", item) and not name_en:
+        elif EN_RE.search(item) and not name_en:
             name_en = item.strip()
     return name_en, name_zh, name_jp
 
 
 def find_tags(other):
-    elements = re.sub(r"[\[\]()（）]", " ", other).split(" ")
+    elements = TAG_SPLIT_RE.sub(" ", other).split(" ")
     # find CHT
     sub, resolution, source = None, None, None
     for element in filter(lambda x: x != "", elements):
@@ -123,12 +142,16 @@ def find_tags(other):
 def clean_sub(sub: str | None) -> str | None:
     if sub is None:
         return sub
-    return re.sub(r"_MP4|_MKV", "", sub)
+    return SUB_SUFFIX_RE.sub("", sub)
 
 
 def process(raw_title: str):
-    content_title = pre_process(raw_title)
     # 预处理标题
+    return _process(pre_process(raw_title))
+
+
+@lru_cache(maxsize=RAW_PARSER_CACHE_SIZE)
+def _process(content_title: str) -> Episode | None:
     group = get_group(content_title)
     # 翻译组的名字
     match_obj = TITLE_RE.match(content_title)
@@ -168,6 +191,9 @@ def process(raw_title: str):
 
 
 def raw_parser(raw: str) -> Episode | None:
+    """Parse a release title. Results are memoized on the normalized title
+    and shared between callers, so they are frozen.
+    """
     ret = process(raw)
     if ret is None:
         logger.error("Parser cannot analyse {}", raw)
@@ -175,6 +201,11 @@ def raw_parser(raw: str) -> Episode | None:
     return ret
 
 
+def raw_parser_cache_info():
+    """Hits, misses and size of the raw_parser memo."""
+    return _process.cache_info()
+
+
 if __name__ == "__main__":
     title = "【喵萌奶茶屋】★01月新番★[我内心的糟糕念头 / Boku no Kokoro no Yabai Yatsu][25][1080p][简日双语][v2][招募翻译]"
     print(raw_parser(title))
@@ -1,12 +1,20 @@
+import asyncio
 import re
 import time
 from dataclasses import dataclass
 
-from module.conf import TMDB_API
-from module.network import RequestContent
+from module.conf import POSTERS_PATH, TMDB_API, TMDB_CACHE_PATH
+from module.network import JSONCache, RequestContent
 from module.utils import save_image
 
 TMDB_URL = "https://api.themoviedb.org"
+# Search results whose details are looked up at once.
+PROBE_CONCURRENCY = 8
+
+# Searches without results are cached too, but only for a day.
+tmdb_cache = JSONCache(
+    TMDB_CACHE_PATH, is_negative=lambda data: not data.get("results", True)
+)
 
 
 @dataclass
@@ -31,17 +39,62 @@ def info_url(e, key):
     return f"{TMDB_URL}/3/tv/{e}?api_key={TMDB_API}&language={LANGUAGE[key]}"
 
 
-async def is_animation(tv_id, language) -> bool:
-    url_info = info_url(tv_id, language)
-    async with RequestContent() as req:
-        content = await req.get_json(url_info)
-        if content is None:
-            return False
-        type_id = content["genres"]
-        for type in type_id:
-            if type.get("id") == 16:
-                return True
-    return False
+def _fetch_json(url):
+    return lambda req: req.get_json(url)
+
+
+async def search_tv(req: RequestContent, title: str) -> dict | None:
+    return await tmdb_cache.get(
+        ("search/tv", title, ""), _fetch_json(search_url(title)), req
+    )
+
+
+async def tv_info(req: RequestContent, tv_id, language) -> dict | None:
+    return await tmdb_cache.get(
+        ("tv", tv_id, language), _fetch_json(info_url(tv_id, language)), req
+    )
+
+
+async def poster_link(req: RequestContent, poster_path: str) -> str | None:
+    """Download a poster once, later calls get the saved file."""
+
+    async def fetch(req: RequestContent):
+        img = await req.get_content(f"https://image.tmdb.org/t/p/w780{poster_path}")
+        if img is None:
+            return None
+        return {"link": await save_image(img, "jpg")}
+
+    key = ("poster", poster_path, "")
+    saved = await tmdb_cache.get(key, fetch, req)
+    if saved and not (POSTERS_PATH.parent / saved["link"]).exists():
+        tmdb_cache.forget(key)
+        saved = await tmdb_cache.get(key, fetch, req)
+    return saved["link"] if saved else None
+
+
+def is_animation(info: dict | None) -> bool:
+    if info is None:
+        return False
+    return any(genre.get("id") == 16 for genre in info.get("genres", ()))
+
+
+async def probe_candidates(
+    req: RequestContent, candidates: list[dict], language
+) -> tuple[int, dict | None]:
+    """Fetch the details of every search result concurrently and pick the
+    first animation, else the last result as before.
+    """
+    limit = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+    async def probe(candidate: dict) -> dict | None:
+        async with limit:
+            return await tv_info(req, candidate["id"], language)
+
+    details = await asyncio.gather(*(probe(c) for c in candidates))
+    for candidate, info in zip(candidates, details, strict=True):
+        if is_animation(info):
+            return candidate["id"], info
+    return candidates[-1]["id"], details[-1]
 
 
 def get_season(seasons: list) -> tuple[int, str | None]:
@@ -64,25 +117,18 @@ def get_season(seasons: list) -> tuple[int, str | None]:
 
 async def tmdb_parser(title, language, test: bool = False) -> TMDBInfo | None:
     async with RequestContent() as req:
-        url = search_url(title)
-        content = await req.get_json(url)
+        content = await search_tv(req, title)
         if content is None:
             return None
         contents = content.get("results")
         if not contents:
-            url = search_url(title.replace(" ", ""))
-            content = await req.get_json(url)
+            content = await search_tv(req, title.replace(" ", ""))
             if content is None:
                 return None
             contents = content.get("results")
         # 判断动画
         if contents:
-            for content in contents:
-                id = content["id"]
-                if await is_animation(id, language):
-                    break
-            url_info = info_url(id, language)
-            info_content = await req.get_json(url_info)
+            id, info_content = await probe_candidates(req, contents, language)
             if info_content is None:
                 return None
             season = [
@@ -102,16 +148,13 @@ async def tmdb_parser(title, language, test: bool = False) -> TMDBInfo | None:
             year_number = first_air_date.split("-")[0] if first_air_date else ""
             if poster_path:
                 if not test:
-                    img = await req.get_content(
-                        f"https://image.tmdb.org/t/p/w780{poster_path}"
-                    )
-                    if img is None:
+                    link = await poster_link(req, poster_path)
+                    if link is None:
                         return None
-                    poster_link = await save_image(img, "jpg")
                 else:
-                    poster_link = "https://image.tmdb.org/t/p/w780" + poster_path
+                    link = "https://image.tmdb.org/t/p/w780" + poster_path
             else:
-                poster_link = None
+                link = None
             return TMDBInfo(
                 id,
                 official_title,
@@ -119,7 +162,7 @@ async def tmdb_parser(title, language, test: bool = False) -> TMDBInfo | None:
                 season,
                 last_season,
                 str(year_number),
-                poster_link,
+                link,
             )
         else:
             return None
@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 from pathlib import Path
 
 from module.models import EpisodeFile, SubtitleFile, TorrentInfo
@@ -15,7 +16,14 @@ RULES = [
 ]
 
 
-compiled_rules = [re.compile(rule, flags=re.I) for rule in RULES]
+# All rules in one pattern. Match is anchored at the start, so the first
+# rule that can match wins, as when they were tried one by one.
+EPISODE_RE = re.compile(
+    "|".join(f"(?P<rule{i}>{rule})" for i, rule in enumerate(RULES)), flags=re.I
+)
+
+# Distinct names whose parse results are kept.
+NAME_CACHE_SIZE = 4096
 
 SUBTITLE_LANG = {
     "zh-tw": ["tc", "cht", "繁", "zh-tw"],
@@ -40,9 +48,7 @@ group_match_pattern = re.compile(r"\d+")
 
 
 def get_group(group_and_title) -> tuple[str | None, str]:
-    n = group_split_pattern.split(group_and_title)
-    while "" in n:
-        n.remove("")
+    n = [part for part in group_split_pattern.split(group_and_title) if part]
     if len(n) > 1:
         if group_match_pattern.match(n[1]):
             return None, group_and_title
@@ -51,18 +57,22 @@ def get_group(group_and_title) -> tuple[str | None, str]:
         return None, n[0]
 
 
-season_remove_pattern = re.compile(r"([Ss]|Season )\d{1,3}")
-season_search_pattern = re.compile(r"([Ss]|Season )(\d{1,3})", re.I)
+season_pattern = re.compile(r"([Ss]|Season )(\d{1,3})", re.I)
+# Markers removed from the title; matching is case-insensitive above.
+SEASON_MARKERS = ("S", "s", "Season ")
 
 
 def get_season_and_title(season_and_title) -> tuple[str, int]:
-    title = season_remove_pattern.sub("", season_and_title).strip()
-    try:
-        match = season_search_pattern.search(season_and_title)
-        season = match.group(2) if match else 1
-    except AttributeError:
-        season = 1
-    return title, int(season)
+    season = None
+    parts, start = [], 0
+    for match in season_pattern.finditer(season_and_title):
+        if season is None:
+            season = int(match.group(2))
+        if match.group(1) in SEASON_MARKERS:
+            parts.append(season_and_title[start : match.start()])
+            start = match.end()
+    parts.append(season_and_title[start:])
+    return "".join(parts).strip(), season if season is not None else 1
 
 
 def get_subtitle_lang(subtitle_name: str) -> str | None:
@@ -88,66 +98,78 @@ def parse_episode(episode: str) -> int | float:
     return int(episode) if episode.isdigit() else float(episode)
 
 
+def match_episode(name: str) -> tuple[str, str] | None:
+    """Title part and episode number of ``name`` by the first matching rule."""
+    match = EPISODE_RE.match(name)
+    if match is None:
+        return None
+    # The rule's own group closes last; its title and episode follow it.
+    rule = match.lastindex
+    return match.group(rule + 1), match.group(rule + 2)
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def parse_name(name: str) -> tuple[str | None, str, int, int | float, int] | None:
+    """Group, title, season, episode and revision of a torrent or file name."""
+    name = pre_process(name)
+    matched = match_episode(name)
+    if matched is None:
+        return None
+    group_and_title, episode = matched
+    group, title = get_group(group_and_title)
+    title, season = get_season_and_title(title)
+    return group, title, season, parse_episode(episode), get_episode_revision(name)
+
+
 def torrent_parser(
     torrent_path: str,
     torrent_name: str | None = None,
     season: int | None = None,
     file_type: str = "media",
 ) -> EpisodeFile | SubtitleFile | None:
-    media_path = get_path_basename(torrent_path)
-    match_names = filter(None, [torrent_name, media_path])
-    for match_name in match_names:
-        match_name = pre_process(match_name)
-        for compiled_rule in compiled_rules:
-            match_obj = compiled_rule.match(match_name)
-            if match_obj:
-                episode_revision = get_episode_revision(match_name)
-                group, title = get_group(match_obj.group(1))
-                if season is None:
-                    title, season = get_season_and_title(title)
-                else:
-                    title, _ = get_season_and_title(title)
-                episode = match_obj.group(2)
-                episode = parse_episode(episode)
-                suffix = Path(torrent_path).suffix
-                if file_type == "media":
-                    return EpisodeFile(
-                        media_path=torrent_path,
-                        group=group,
-                        title=title,
-                        season=season,
-                        episode=episode,
-                        episode_revision=episode_revision,
-                        suffix=suffix,
-                    )
-                elif file_type == "subtitle":
-                    language = get_subtitle_lang(media_path)
-                    if language is None:
-                        return None
-                    return SubtitleFile(
-                        media_path=torrent_path,
-                        group=group,
-                        title=title,
-                        season=season,
-                        language=language,
-                        episode=episode,
-                        episode_revision=episode_revision,
-                        suffix=suffix,
-                    )
+    path = Path(torrent_path)
+    media_path = path.name
+    for match_name in filter(None, [torrent_name, media_path]):
+        parsed = parse_name(match_name)
+        if parsed is None:
+            continue
+        group, title, name_season, episode, episode_revision = parsed
+        if season is None:
+            season = name_season
+        if file_type == "media":
+            return EpisodeFile(
+                media_path=torrent_path,
+                group=group,
+                title=title,
+                season=season,
+                episode=episode,
+                episode_revision=episode_revision,
+                suffix=path.suffix,
+            )
+        elif file_type == "subtitle":
+            language = get_subtitle_lang(media_path)
+            if language is None:
+                return None
+            return SubtitleFile(
+                media_path=torrent_path,
+                group=group,
+                title=title,
+                season=season,
+                language=language,
+                episode=episode,
+                episode_revision=episode_revision,
+                suffix=path.suffix,
+            )
     return None
 
 
 def torrent_name_parser(torrent_name: str) -> TorrentInfo | None:
     torrent_name = pre_process(torrent_name)
-    for compiled_rule in compiled_rules:
-        match_obj = compiled_rule.match(torrent_name)
-        if match_obj:
-            episode_revision = get_episode_revision(torrent_name)
-            title = match_obj.group(1)
-            episode = match_obj.group(2)
-            episode = parse_episode(episode)
-            return TorrentInfo(
-                title=title,
-                episode=episode,
-                episode_revision=episode_revision,
-            )
+    matched = match_episode(torrent_name)
+    if matched:
+        title, episode = matched
+        return TorrentInfo(
+            title=title,
+            episode=parse_episode(episode),
+            episode_revision=get_episode_revision(torrent_name),
+        )
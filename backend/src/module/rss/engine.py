@@ -1,12 +1,20 @@
+import asyncio
 import re
+import time
 
 from loguru import logger
 
+from module.conf import settings
 from module.database import Database, engine
 from module.downloader import DownloadClient
 from module.models import Bangumi, ResponseModel, RSSItem, Torrent
-from module.network import RequestContent
+from module.network import FeedResult, HostLimiter, RequestContent
 from module.utils.multi_version_filter import filter_multi_version_torrents
+from module.utils.rule_filter import compile_filter
+
+from . import scheduler
+
+SLOW_FEED_SECONDS = 10
 
 
 class RSSEngine(Database):
@@ -100,17 +108,24 @@ class RSSEngine(Database):
     async def match_torrent(self, torrent: Torrent) -> Bangumi | None:
         matched: Bangumi | None = await self.bangumi.match_torrent(torrent.name)
         if matched:
-            if matched.filter == "":
-                return matched
-            _filter = matched.filter.replace(",", "|")
-            if not re.search(_filter, torrent.name, re.IGNORECASE):
+            try:
+                _filter = compile_filter(
+                    matched.filter.replace(",", "|"), ignore_case=True
+                )
+            except re.error as e:
+                # Stored before filters were validated; skip just this rule.
+                logger.warning(
+                    "[Engine] Invalid filter of {}: {}", matched.official_title, e
+                )
+                return None
+            if _filter is None or _filter.search(torrent.name) is None:
                 torrent.bangumi_id = matched.id
                 return matched
         return None
 
-    async def fetch_aggregate_rss(self, rss_item: RSSItem) -> list[Torrent]:
-        async with RequestContent() as req:
-            torrents = await req.get_torrents(rss_item.url)
+    async def parse_aggregate_rss(
+        self, rss_item: RSSItem, torrents: list[Torrent]
+    ) -> list[Torrent]:
         torrents_to_add = await self.bangumi.match_list(torrents.copy(), rss_item.url)
         if not torrents_to_add:
             logger.debug("[RSS] No new title has been found.")
@@ -123,39 +138,159 @@ class RSSEngine(Database):
             await self.bangumi.add_all(new_data)
         return torrents
 
-    async def fetch_regular_rss(self, rss_item: RSSItem) -> list[Torrent]:
-        bangumi = (await self.bangumi.search_rss(rss_item.url))[0]
+    async def _regular_filter(self, rss_item: RSSItem) -> str | None:
+        bangumis = await self.bangumi.search_rss(rss_item.url)
+        if not bangumis:
+            return None
+        _filter = bangumis[0].filter.replace(",", "|")
+        try:
+            compile_filter(_filter)
+        except re.error as e:
+            # Poll unfiltered; match_torrent skips the broken rule.
+            logger.warning(
+                "[Engine] Invalid filter of {}: {}", bangumis[0].official_title, e
+            )
+            return None
+        return _filter
+
+    @staticmethod
+    async def _fetch_feed(
+        req: RequestContent,
+        limiter: HostLimiter,
+        rss_item: RSSItem,
+        _filter: str | None,
+        force: bool = False,
+    ) -> FeedResult:
+        async with limiter.acquire(rss_item.url):
+            start = time.perf_counter()
+            try:
+                result = await req.poll_torrents(rss_item, _filter, force=force)
+            except Exception as e:
+                logger.warning("[Engine] Failed to fetch RSS {}: {}", rss_item.name, e)
+                return FeedResult.failed(rss_item)
+            elapsed = time.perf_counter() - start
+        if result.error:
+            summary = "failed"
+        elif result.torrents is None:
+            summary = "not modified"
+        else:
+            summary = f"{len(result.torrents)} torrents"
+        if elapsed >= SLOW_FEED_SECONDS:
+            logger.warning(
+                "[Engine] Slow RSS {}: {} in {:.2f}s", rss_item.name, summary, elapsed
+            )
+        else:
+            logger.debug(
+                "[Engine] Fetched RSS {}: {} in {:.2f}s",
+                rss_item.name,
+                summary,
+                elapsed,
+            )
+        return result
+
+    async def fetch_rss_items(
+        self, rss_items: list[RSSItem], force: bool = False
+    ) -> list[tuple[RSSItem, FeedResult]]:
+        # Resolve filters up front: the session can't be shared across tasks.
+        filters: list[str | None] = []
+        for rss_item in rss_items:
+            if rss_item.aggregate:
+                filters.append(None)
+                continue
+            _filter = await self._regular_filter(rss_item)
+            if _filter is None:
+                logger.debug("[Engine] No bangumi found for RSS {}", rss_item.name)
+            filters.append(_filter)
+        limiter = HostLimiter(
+            settings.program.rss_concurrency, settings.program.rss_host_concurrency
+        )
+        start = time.perf_counter()
         async with RequestContent() as req:
-            torrents = await req.get_torrents(
-                rss_item.url, bangumi.filter.replace(",", "|")
+            results = await asyncio.gather(
+                *(
+                    self._fetch_feed(req, limiter, rss_item, _filter, force)
+                    for rss_item, _filter in zip(rss_items, filters, strict=True)
+                )
             )
-        return torrents
+        logger.debug(
+            "[Engine] Fetched {} RSS items in {:.2f}s",
+            len(rss_items),
+            time.perf_counter() - start,
+        )
+        return list(zip(rss_items, results, strict=True))
+
+    async def _process_torrents(
+        self, client: DownloadClient, rss_item: RSSItem, torrents: list[Torrent]
+    ) -> tuple[list[Torrent], bool]:
+        """Match and add the new torrents of a feed.
+
+        Returns them, and whether a matched torrent failed to be added.
+        """
+        if rss_item.aggregate:
+            torrents = await self.parse_aggregate_rss(rss_item, torrents)
+        filter_multi_version_torrents(torrents)
+        new_torrents = await self.torrent.check_new(torrents)
+        failed = False
+        # Get all enabled bangumi data
+        for torrent in new_torrents:
+            torrent.rss_id = rss_item.id
+            matched_data = await self.match_torrent(torrent)
+            if matched_data:
+                if await client.add_torrent(torrent, matched_data):
+                    logger.debug("[Engine] Add torrent {} to client", torrent.name)
+                else:
+                    failed = True
+        # Add all torrents to database
+        await self.torrent.add_all(new_torrents)
+        return new_torrents, failed
 
-    async def refresh_rss(self, client: DownloadClient, rss_id: int | None = None):
+    async def refresh_rss(
+        self,
+        client: DownloadClient,
+        rss_id: int | None = None,
+        force: bool = False,
+        due_only: bool = False,
+    ):
         # Get All RSS Items
         if not rss_id:
             rss_items: list[RSSItem] = await self.rss.search_active()
+            if due_only:
+                now = time.time()
+                rss_items = [item for item in rss_items if scheduler.is_due(item, now)]
         else:
             rss_item = await self.rss.search_id(rss_id)
             rss_items = [rss_item] if rss_item else []
         # From RSS Items, get all torrents
         logger.debug("[Engine] Get {} RSS items", len(rss_items))
-        for rss_item in rss_items:
-            if rss_item.aggregate:
-                torrents = await self.fetch_aggregate_rss(rss_item)
+        for rss_item, result in await self.fetch_rss_items(rss_items, force):
+            new_torrents, failed = [], False
+            if result.torrents is not None:
+                new_torrents, failed = await self._process_torrents(
+                    client, rss_item, result.torrents
+                )
+            elif result.unchanged:
+                logger.debug("[Engine] RSS {} not modified, skip.", rss_item.name)
+            scheduler.reschedule(
+                rss_item,
+                changed=bool(new_torrents),
+                ttl=result.ttl,
+                retry_after=result.retry_after,
+            )
+            if failed:
+                # Keep the old watermark and drop the validators, so the next
+                # poll parses these items again and retries the failed add.
+                rss_item.etag = rss_item.last_modified = None
+                rss_item.content_hash = None
             else:
-                torrents = await self.fetch_regular_rss(rss_item)
-            filter_multi_version_torrents(torrents)
-            new_torrents = await self.torrent.check_new(torrents)
-            # Get all enabled bangumi data
-            for torrent in new_torrents:
-                torrent.rss_id = rss_item.id
-                matched_data = await self.match_torrent(torrent)
-                if matched_data:
-                    if await client.add_torrent(torrent, matched_data):
-                        logger.debug("[Engine] Add torrent {} to client", torrent.name)
-            # Add all torrents to database
-            await self.torrent.add_all(new_torrents)
+                # Only remember the response once it has been fully processed.
+                rss_item.etag = result.etag
+                rss_item.last_modified = result.last_modified
+                rss_item.content_hash = result.content_hash
+                rss_item.watermark = result.watermark
+            await self.rss.update_poll(rss_item)
+
+    async def next_poll_delay(self) -> float:
+        return scheduler.seconds_until_due(await self.rss.search_active())
 
     async def download_bangumi(self, bangumi: Bangumi):
         async with RequestContent() as req:
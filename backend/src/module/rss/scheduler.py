@@ -0,0 +1,62 @@
+import random
+import time
+
+from module.conf import settings
+from module.models import RSSItem
+
+# Never poll faster than this, whatever the feed or rss_time says.
+MIN_INTERVAL = 60
+# Upper bound for feeds that keep coming back unchanged, in multiples of rss_time.
+MAX_BACKOFF = 4
+# Cap for <ttl>/Retry-After hints so a bogus value can't park a feed forever.
+MAX_HINT = 24 * 3600
+JITTER = 0.1
+
+
+def interval_bounds() -> tuple[int, int]:
+    base = settings.program.rss_time
+    lower = max(base // 4, min(MIN_INTERVAL, base))
+    return lower, max(base * MAX_BACKOFF, lower)
+
+
+def is_due(rss: RSSItem, now: float | None = None) -> bool:
+    now = time.time() if now is None else now
+    return rss.next_poll is None or rss.next_poll <= now
+
+
+def reschedule(
+    rss: RSSItem,
+    changed: bool,
+    ttl: int | None = None,
+    retry_after: int | None = None,
+    now: float | None = None,
+):
+    """Pick the next poll time of ``rss`` from what the last poll returned.
+
+    Feeds with new items are polled twice as often, quiet feeds back off by
+    half again each time, both within ``interval_bounds``. A channel
+    ``<ttl>`` (minutes) and a ``Retry-After`` (seconds) are lower bounds.
+    """
+    now = time.time() if now is None else now
+    lower, upper = interval_bounds()
+    interval = rss.poll_interval or settings.program.rss_time
+    if changed:
+        interval = interval // 2
+    else:
+        interval = int(interval * 1.5)
+    interval = min(max(interval, lower), upper)
+    if ttl:
+        interval = max(interval, min(ttl * 60, MAX_HINT))
+    rss.poll_interval = interval
+    delay = interval
+    if retry_after:
+        delay = max(delay, min(retry_after, MAX_HINT))
+    # Spread feeds out so they don't all come due in the same tick.
+    rss.next_poll = now + delay * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def seconds_until_due(rss_items: list[RSSItem], now: float | None = None) -> float:
+    now = time.time() if now is None else now
+    if not rss_items:
+        return settings.program.rss_time
+    return max(min((rss.next_poll or now) - now for rss in rss_items), 0)
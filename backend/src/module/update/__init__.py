@@ -1,9 +1,10 @@
 from .cross_version import cache_image
-from .data_migration import torrent_migration
+from .data_migration import schema_migration, torrent_migration
 from .startup import first_run
 
 __all__ = [
     "cache_image",
+    "schema_migration",
     "torrent_migration",
     "first_run",
 ]
@@ -1,12 +1,80 @@
 from loguru import logger
+from sqlalchemy import inspect, literal
 from sqlalchemy.sql import text
+from sqlmodel import SQLModel
 
+from module.database import Database, engine
 from module.models import Torrent
 from module.network import RequestContent
 from module.rss import RSSEngine
 from module.utils import torrent_hash
 
 
+def _add_missing_columns(session):
+    connection = session.connection()
+    dialect = connection.dialect
+    inspector = inspect(connection)
+    for mapper in SQLModel._sa_registry.mappers:
+        model, table = mapper.class_, mapper.local_table
+        if not inspector.has_table(table.name):
+            logger.info("[Database] Create table {}", table.name)
+            table.create(connection)
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect)}"
+            default = model.model_fields[column.name].default
+            if default is not None:
+                value = literal(default).compile(
+                    dialect=dialect, compile_kwargs={"literal_binds": True}
+                )
+                ddl += f" NOT NULL DEFAULT {value}"
+            logger.info("[Database] Add column {}.{}", table.name, column.name)
+            connection.execute(text(ddl))
+        indexes = {
+            index["name"]: bool(index["unique"])
+            for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            if indexes.get(index.name) == bool(index.unique):
+                continue
+            if index.name in indexes:
+                index.drop(connection)
+            if index.unique:
+                _drop_duplicates(connection, table, index)
+            logger.info("[Database] Create index {}", index.name)
+            index.create(connection)
+
+
+def _drop_duplicates(connection, table, index):
+    # Keep one row of each key so the unique index can be built: a
+    # downloaded one if any (a failed add is often followed by a successful
+    # one), else the oldest.
+    columns = ", ".join(column.name for column in index.columns)
+    order = "downloaded DESC, id" if "downloaded" in table.c else "id"
+    result = connection.execute(
+        text(
+            f"DELETE FROM {table.name} WHERE id NOT IN "
+            f"(SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+            f"(PARTITION BY {columns} ORDER BY {order}) AS n "
+            f"FROM {table.name}) WHERE n = 1)"
+        )
+    )
+    if result.rowcount:
+        logger.warning(
+            "[Database] Remove {} duplicated rows from {}", result.rowcount, table.name
+        )
+
+
+async def schema_migration(_engine=engine):
+    """Bring an existing database up to the current tables, columns and indexes."""
+    async with Database(_engine) as db:
+        await db.run_sync(_add_missing_columns)
+        await db.commit()
+
+
 async def torrent_migration():
     async with RSSEngine() as db:
         async with RequestContent() as req:
@@ -27,10 +95,10 @@ async def torrent_migration():
                 if url.startswith("magnet"):
                     info_hash = torrent_hash.from_magnet(url)
                 else:
-                    content = await req.get_content(url)
-                    if content is None:
+                    torrent_file = await req.get_torrent(url)
+                    if torrent_file is None:
                         continue
-                    info_hash = torrent_hash.from_torrent(content)
+                    info_hash = torrent_file.info_hash
                 torrent["hash"] = info_hash
             readd_torrents = [Torrent(**torrent) for torrent in torrents]
             table = Torrent.__table__  # type: ignore[attr-defined]
@@ -0,0 +1,128 @@
+import hashlib
+from typing import NamedTuple
+
+# Container states while scanning.
+_LIST, _KEY, _VALUE = 0, 1, 2
+_DIGITS = frozenset(b"0123456789")
+_INT, _LIST_START, _DICT_START, _END = b"ilde"
+
+
+class TorrentScan(NamedTuple):
+    valid: bool
+    # sha1 of the info dict; None for v2-only torrents.
+    v1: str | None = None
+    # sha256 of the info dict of v2 and hybrid torrents.
+    v2: str | None = None
+
+    @property
+    def info_hash(self) -> str | None:
+        """The id qBittorrent gives the torrent: v1, else truncated v2."""
+        return self.v1 or (self.v2[:40] if self.v2 else None)
+
+
+def _int_end(data: bytes, i: int) -> int:
+    end = data.index(b"e", i)
+    digits = data[i + 1 : end].removeprefix(b"-")
+    if not digits.isdigit():
+        raise ValueError(f"bad integer at {i}")
+    return end + 1
+
+
+def _str_end(data: bytes, i: int) -> int:
+    colon = data.index(b":", i)
+    length = data[i:colon]
+    if not length.isdigit():
+        raise ValueError(f"bad string length at {i}")
+    end = colon + 1 + int(length)
+    if end > len(data):
+        raise ValueError(f"string at {i} runs past the end")
+    return end
+
+
+def value_end(data: bytes, i: int) -> int:
+    """Index right after the bencoded value starting at ``i``.
+
+    String bodies are skipped by their length, so large blobs such as
+    ``pieces`` cost nothing. Raises ValueError on malformed input.
+    """
+    stack: list[int] = []
+    while True:
+        c = data[i]
+        if c == _END and stack and stack[-1] != _VALUE:
+            stack.pop()
+            i += 1
+        elif stack and stack[-1] == _KEY:
+            # Dictionary keys are strings.
+            if c not in _DIGITS:
+                raise ValueError(f"bad dictionary key at {i}")
+            i = _str_end(data, i)
+        elif c == _LIST_START:
+            stack.append(_LIST)
+            i += 1
+            continue
+        elif c == _DICT_START:
+            stack.append(_KEY)
+            i += 1
+            continue
+        elif c == _INT:
+            i = _int_end(data, i)
+        elif c in _DIGITS:
+            i = _str_end(data, i)
+        else:
+            raise ValueError(f"unexpected {chr(c)!r} at {i}")
+        if not stack:
+            return i
+        if stack[-1] == _KEY:
+            stack[-1] = _VALUE
+        elif stack[-1] == _VALUE:
+            stack[-1] = _KEY
+
+
+def dict_items(data: bytes, i: int) -> tuple[dict[bytes, tuple[int, int]], int]:
+    """Value spans by key of the dictionary at ``i``, and its end index."""
+    if data[i] != _DICT_START:
+        raise ValueError(f"expected a dictionary at {i}")
+    items = {}
+    i += 1
+    while data[i] != _END:
+        key_end = _str_end(data, i)
+        end = value_end(data, key_end)
+        items[data[data.index(b":", i) + 1 : key_end]] = (key_end, end)
+        i = end
+    return items, i + 1
+
+
+def scan_torrent(content: bytes) -> TorrentScan:
+    """Validate a .torrent payload and hash its info dict in one pass.
+
+    The info hashes are taken over the raw ``info`` bytes, without decoding
+    or re-encoding them.
+    """
+    info, keys = None, {}
+    try:
+        # A metainfo file is one non-empty dictionary and nothing else.
+        if content[:1] != b"d" or content == b"de":
+            return TorrentScan(False)
+        i = 1
+        while content[i] != _END:
+            key_end = _str_end(content, i)
+            key = content[content.index(b":", i) + 1 : key_end]
+            if key == b"info" and content[key_end] == _DICT_START:
+                keys, end = dict_items(content, key_end)
+                info = memoryview(content)[key_end:end]
+            else:
+                end = value_end(content, key_end)
+            i = end
+        if i + 1 != len(content):
+            return TorrentScan(False)
+    except ValueError, IndexError:
+        return TorrentScan(False)
+    if info is None:
+        return TorrentScan(True)
+    version = keys.get(b"meta version")
+    v2 = version is not None and content[version[0] : version[1]] == b"i2e"
+    return TorrentScan(
+        True,
+        v1=hashlib.sha1(info).hexdigest() if b"pieces" in keys or not v2 else None,
+        v2=hashlib.sha256(info).hexdigest() if v2 else None,
+    )
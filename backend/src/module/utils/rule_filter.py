@@ -0,0 +1,13 @@
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=512)
+def compile_filter(pattern: str, ignore_case: bool = False) -> re.Pattern | None:
+    """Compile a filter once per distinct pattern, None when it is empty.
+
+    A changed filter is a new key, so there is nothing to invalidate.
+    """
+    if not pattern:
+        return None
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
@@ -1,11 +1,5 @@
-from torrentool.bencode import Bencode
-from torrentool.exceptions import BencodeDecodingError
+from .bencode import scan_torrent
 
 
 def check_torrent(content: bytes) -> bool:
-    try:
-        if Bencode.decode(content):
-            return True
-        return False
-    except BencodeDecodingError:
-        return False
+    return scan_torrent(content).valid
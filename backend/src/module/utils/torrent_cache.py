@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from module.conf import TORRENTS_PATH
+
+# Upper bound of the cache directory, least recently used files go first.
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class TorrentCache:
+    """On-disk store of .torrent payloads.
+
+    Payloads are content-addressed by info hash (``<hash>.torrent``); each
+    url they were downloaded from links to that hash under ``urls/``. File
+    mtimes record the last use for LRU eviction.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size: int | None = None
+        self._lock = threading.Lock()
+
+    def _path(self, info_hash: str) -> Path:
+        return self.root / f"{info_hash}.torrent"
+
+    def _link(self, url: str) -> Path:
+        return self.root / "urls" / hashlib.sha1(url.encode()).hexdigest()
+
+    def _read(self, url: str) -> tuple[bytes, str] | None:
+        link = self._link(url)
+        try:
+            info_hash = link.read_text().strip()
+            path = self._path(info_hash)
+            content = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            # Never seen, or the payload was evicted.
+            link.unlink(missing_ok=True)
+            return None
+        return content, info_hash
+
+    def _write(self, url: str, content: bytes, info_hash: str):
+        path = self._path(info_hash)
+        with self._lock:
+            self._link(url).parent.mkdir(parents=True, exist_ok=True)
+            if self._size is None:
+                self._size = sum(f.stat().st_size for f in self.root.glob("*.torrent"))
+            if not path.exists():
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(content)
+                tmp.replace(path)
+                self._size += len(content)
+            else:
+                os.utime(path)
+            self._link(url).write_text(info_hash)
+            self._evict()
+
+    def _evict(self):
+        if self._size is None or self._size <= self.max_bytes:
+            return
+        files = sorted(self.root.glob("*.torrent"), key=lambda f: f.stat().st_mtime)
+        for file in files:
+            if self._size <= self.max_bytes:
+                break
+            self._size -= file.stat().st_size
+            file.unlink()
+            logger.debug("[Cache] Evict {}", file.name)
+        self._prune_links()
+
+    def _prune_links(self):
+        """Remove url links whose payload is gone."""
+        for link in (self.root / "urls").iterdir():
+            try:
+                info_hash = link.read_text().strip()
+            except OSError:
+                continue
+            if not self._path(info_hash).exists():
+                link.unlink(missing_ok=True)
+
+    async def get(self, url: str) -> tuple[bytes, str] | None:
+        """The payload downloaded from ``url`` and its info hash."""
+        return await asyncio.to_thread(self._read, url)
+
+    async def put(self, url: str, content: bytes, info_hash: str):
+        """Store a .torrent payload already validated and hashed."""
+        try:
+            await asyncio.to_thread(self._write, url, content, info_hash)
+        except OSError as e:
+            logger.debug("[Cache] Cannot cache {}: {}", url, e)
+
+
+torrent_cache = TorrentCache(TORRENTS_PATH)
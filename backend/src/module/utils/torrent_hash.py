@@ -1,16 +1,11 @@
 import base64
 import urllib.parse
 
-from torrentool.bencode import Bencode
-from torrentool.torrent import Torrent
+from .bencode import scan_torrent
 
 
 def from_torrent(content: bytes) -> str | None:
-    decoded = Bencode.decode(content)
-    if not isinstance(decoded, dict):
-        return None
-    torrent = Torrent(decoded)
-    return torrent.info_hash
+    return scan_torrent(content).info_hash
 
 
 def from_magnet(magnet_link: str) -> str | None:
@@ -20,10 +15,10 @@ def from_magnet(magnet_link: str) -> str | None:
         if info_hash.startswith("urn:btih:"):
             info_hash = info_hash.removeprefix("urn:btih:")
             if len(info_hash) == 32:
-                info_hash = base64.b32decode(info_hash).hex()
+                info_hash = base64.b32decode(info_hash.upper()).hex()
         elif info_hash.startswith("urn:btmh:1220"):
             info_hash = info_hash.removeprefix("urn:btmh:1220")
         else:
             continue
-        return info_hash
+        return info_hash.lower()
     return None
@@ -2,7 +2,8 @@ import pytest
 from pydantic import ValidationError
 
 import module.conf.config as config_module
-from module.models.config import Downloader
+from module.models import BangumiUpdate
+from module.models.config import Downloader, RSSParser
 from module.utils import json_config
 from module.utils.atomic_write import atomic_write
 
@@ -67,3 +68,15 @@ def test_atomic_write_writes_content_and_leaves_no_temp_files(tmp_path):
 
     assert target.read_text(encoding="utf-8") == "hello"
     assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_rss_filter_invalid_pattern_raises():
+    assert RSSParser(filter=["720", r"\d+-\d"]).filter == ["720", r"\d+-\d"]
+    with pytest.raises(ValidationError):
+        RSSParser(filter=["[720"])
+
+
+def test_bangumi_filter_is_validated():
+    assert BangumiUpdate(filter=r"720,\d+-\d+").filter == r"720,\d+-\d+"
+    with pytest.raises(ValidationError):
+        BangumiUpdate(filter="720,(")
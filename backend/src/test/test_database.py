@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.pool import StaticPool
 
 from module.database.combine import Database
-from module.models import Bangumi, RSSItem, Torrent
+from module.models import Bangumi, BangumiUpdate, RenameRecord, RSSItem, Torrent
 
 # sqlite mock engine
 engine = create_async_engine(
@@ -59,6 +59,15 @@ async def test_bangumi_database():
         assert result is not None
         assert result.official_title == "无职转生，到了异世界就拿出真本事II"
 
+        # disabled rules stop matching but still claim their torrents
+        await db.bangumi.disable_rule(1)
+        name = "[Lilith-Raws] Mushoku Tensei - 12 [Baha][WEB-DL][1080p]"
+        assert await db.bangumi.match_torrent(name) is None
+        other = Torrent(name="[Sub] Other - 01", url="https://test.com/2")
+        torrents = [Torrent(name=name, url="https://test.com/1"), other]
+        assert await db.bangumi.match_list(torrents, "rss2") == [other]
+        assert (await db.bangumi.search_id(1)).rss_link == "test,rss2"
+
         # delete
         await db.bangumi.delete_one(1)
         assert await db.bangumi.search_id(1) is None
@@ -80,10 +89,172 @@ async def test_torrent_database():
         await db.torrent.update(test_data)
         assert await db.torrent.search(1) == test_data
 
+        # check new
+        candidates = [
+            Torrent(name="old", url=test_data.url),
+            *(
+                Torrent(name=f"new {i}", url=f"https://test.com/{i}")
+                for i in range(600)
+            ),
+        ]
+        new_torrents = await db.torrent.check_new(candidates)
+        assert new_torrents == candidates[1:]
+
+        # bulk upsert keeps the fields a torrent didn't set
+        test_data.hash = "abc"
+        await db.torrent.update(test_data)
+        await db.torrent.add_all(candidates)
+        assert all(t.id for t in candidates)
+        updated = await db.torrent.search(test_data.id)
+        assert updated.name == "old"
+        assert updated.downloaded
+        assert updated.hash == "abc"
+        assert len(await db.torrent.search_all()) == 601
+
 
 @pytest.mark.asyncio
 async def test_rss_database():
     rss_url = "https://test.com/test.xml"
+    other_url = "https://test.com/other.xml"
+    aggregate_url = "https://test.com/aggregate.xml"
+    disabled_url = "https://test.com/disabled.xml"
+    urls = (rss_url, other_url, aggregate_url, disabled_url)
+    mark = "https://test.com/1.torrent"
 
     async with Database(engine) as db:
         await db.rss.add(RSSItem(url=rss_url))
+        await db.rss.add(RSSItem(url=other_url))
+        await db.rss.add(RSSItem(url=aggregate_url, aggregate=True))
+        await db.rss.add(RSSItem(url=disabled_url, aggregate=True, enabled=False))
+
+        async def polled():
+            for url in urls:
+                rss = await db.rss.search_url(url)
+                rss.etag, rss.watermark = '"v1"', mark
+                await db.rss.update_poll(rss)
+
+        async def watermarks():
+            return [(await db.rss.search_url(url)).watermark for url in urls]
+
+        # Changing the rules forgets where parsing of their feeds, and of the
+        # active aggregate feeds, stopped.
+        await polled()
+        bangumi = Bangumi(official_title="test", title_raw="test", rss_link=rss_url)
+        await db.bangumi.add(bangumi)
+        assert (await db.rss.search_url(rss_url)).etag is None
+        assert await watermarks() == [None, mark, None, mark]
+
+        # Edits that don't touch matching keep the feeds as they are.
+        await polled()
+        await db.bangumi.update(BangumiUpdate(poster_link="/p.jpg"), bangumi.id)
+        await db.bangumi.update(BangumiUpdate(filter=bangumi.filter), bangumi.id)
+        assert await watermarks() == [mark] * 4
+
+        await db.bangumi.update(BangumiUpdate(filter="720"), bangumi.id)
+        assert await watermarks() == [None, mark, None, mark]
+
+        await polled()
+        await db.rss.rescan_all()
+        assert await watermarks() == [None] * 4
+        assert (await db.rss.search_url(other_url)).etag is None
+
+
+@pytest.mark.asyncio
+async def test_torrent_offsets():
+    async with Database(engine) as db:
+        await db.create_table()
+        old = Bangumi(official_title="old", title_raw="old", offset=1)
+        new = Bangumi(official_title="new", title_raw="new", offset=3)
+        await db.bangumi.add(old)
+        await db.bangumi.add(new)
+        await db.torrent.add_all(
+            [
+                Torrent(url="https://o/1", hash="h1", bangumi_id=old.id),
+                Torrent(url="https://o/2", hash="h1", bangumi_id=new.id),
+                Torrent(url="https://o/3", hash="h2"),
+            ]
+        )
+        offsets = await db.torrent.get_offsets(["h1", "h2", "h3"])
+        # The newest row of a hash wins, as in get_bangumi_id.
+        assert offsets == {"h1": (new.id, 3)}
+        assert await db.torrent.get_bangumi_id("h1") == new.id
+
+
+@pytest.mark.asyncio
+async def test_rename_database():
+    async with Database(engine) as db:
+        await db.create_table()
+        await db.rename.add_all(
+            [
+                RenameRecord(hash="a", fingerprint="f1", offset=0, rename_method="pn"),
+                RenameRecord(hash="b", fingerprint="f2", offset=1, rename_method="pn"),
+            ]
+        )
+        # Marking a torrent again replaces its record.
+        await db.rename.add_all(
+            [
+                RenameRecord(
+                    hash="a", fingerprint="f3", offset=2, rename_method="advance"
+                )
+            ]
+        )
+        records = await db.rename.search_hashes(["a", "b", "c"])
+        assert sorted(records) == ["a", "b"]
+        assert (
+            records["a"].fingerprint,
+            records["a"].offset,
+            records["a"].rename_method,
+        ) == ("f3", 2, "advance")
+
+
+@pytest.mark.asyncio
+async def test_schema_migration_adds_new_columns():
+    from sqlalchemy import inspect, text
+
+    from module.update import schema_migration
+
+    old_engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with old_engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE rssitem (id INTEGER PRIMARY KEY, name VARCHAR, "
+                "url VARCHAR NOT NULL, aggregate BOOLEAN NOT NULL, "
+                "parser VARCHAR NOT NULL, enabled BOOLEAN NOT NULL)"
+            )
+        )
+        await conn.execute(
+            text("INSERT INTO rssitem VALUES (1, 'old', 'https://a', 0, 'mikan', 1)")
+        )
+        await conn.execute(
+            text(
+                "CREATE TABLE torrent (id INTEGER PRIMARY KEY, bangumi_id INTEGER, "
+                "rss_id INTEGER, name VARCHAR NOT NULL, url VARCHAR NOT NULL, "
+                "homepage VARCHAR, downloaded BOOLEAN NOT NULL)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO torrent VALUES (1, NULL, 1, 'a', 'https://a/1', NULL, 1),"
+                " (2, NULL, 1, 'b', 'https://a/1', NULL, 0),"
+                # A failed add, then the same torrent downloaded.
+                " (3, NULL, 1, 'c', 'https://a/2', NULL, 0),"
+                " (4, NULL, 1, 'd', 'https://a/2', NULL, 1)"
+            )
+        )
+    await schema_migration(old_engine)
+    async with Database(old_engine) as db:
+        rss = await db.rss.search_id(1)
+        assert rss is not None
+        assert rss.url == "https://a"
+        assert rss.etag is None
+        indexes = await db.run_sync(
+            lambda session: inspect(session.connection()).get_indexes("torrent")
+        )
+        assert {"ix_torrent_url", "ix_torrent_hash"} <= {i["name"] for i in indexes}
+        assert [t.name for t in await db.torrent.search_all()] == ["a", "d"]
+        # Tables added since are created.
+        assert await db.rename.search_hashes(["a"]) == {}
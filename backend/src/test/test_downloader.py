@@ -1,38 +1,55 @@
 import asyncio
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+import httpx2
 import pytest
-from qbittorrentapi.exceptions import APIConnectionError, Forbidden403Error, LoginFailed
-from requests.exceptions import ConnectionError
+from qbittorrentapi.exceptions import (
+    APIConnectionError,
+    Conflict409Error,
+    Forbidden403Error,
+    LoginFailed,
+    Unauthorized401Error,
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.pool import StaticPool
 
 import module.checker.checker as checker_module
 import module.core.sub_thread as sub_thread_module
+import module.downloader.download_client as download_client_module
+import module.manager.renamer as renamer_module
 from module.checker import Checker
+from module.conf import settings
 from module.core.sub_thread import RSSThread
-from module.downloader import DownloadClient
+from module.database import Database
+from module.downloader import DownloadClient, download_session
+from module.downloader.mirror import TorrentMirror, has_tag
+from module.downloader.qbittorrent import AttrDict, QbittorrentClient
+from module.manager import Renamer
+from module.models import Bangumi, Torrent
+from module.network import TorrentFile
 
 
 def connection_error():
     try:
-        raise ConnectionError("down")
-    except ConnectionError:
+        raise httpx2.ConnectError("down")
+    except httpx2.ConnectError:
         raise APIConnectionError("cannot connect") from None
 
 
 @pytest.mark.asyncio
 async def test_auth_success_returns_true():
     client = object.__new__(DownloadClient)
-    client._client = MagicMock()
+    client._client = AsyncMock()
     await client.auth()
     assert client.authed is True
-    client._client.auth_log_in.assert_called_once()
+    client._client.auth_log_in.assert_awaited_once()
 
 
 @pytest.mark.parametrize("error", [LoginFailed, Forbidden403Error])
 @pytest.mark.asyncio
 async def test_auth_raises_typed_errors(error):
     client = object.__new__(DownloadClient)
-    client._client = MagicMock()
+    client._client = AsyncMock()
     client._client.auth_log_in.side_effect = error()
     with pytest.raises(error):
         await client.auth()
@@ -41,17 +58,17 @@ async def test_auth_raises_typed_errors(error):
 @pytest.mark.asyncio
 async def test_auth_raises_connection_error():
     client = object.__new__(DownloadClient)
-    client._client = MagicMock()
+    client._client = AsyncMock()
     client._client.auth_log_in.side_effect = connection_error
     with pytest.raises(APIConnectionError) as exc_info:
         await client.auth()
-    assert isinstance(exc_info.value.__context__, ConnectionError)
+    assert isinstance(exc_info.value.__context__, httpx2.ConnectError)
 
 
 @pytest.mark.asyncio
 async def test_download_client_enter_propagates_auth_failure():
     client = DownloadClient()
-    client._client = MagicMock()
+    client._client = AsyncMock()
     client._client.auth_log_in.side_effect = LoginFailed()
     with pytest.raises(LoginFailed):
         async with client:
@@ -82,3 +99,355 @@ def test_rss_loop_fails_before_rss_engine(monkeypatch):
     with pytest.raises(LoginFailed):
         asyncio.run(rss_thread._rss_loop())
     mock_engine.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_download_session_logs_in_once(monkeypatch):
+    qb = AsyncMock()
+    monkeypatch.setattr(download_client_module, "_new_client", lambda: qb)
+    async with download_session():
+        for _ in range(3):
+            async with DownloadClient() as client:
+                assert client.authed
+                await client.set_tag("hash", "tag")
+        qb.auth_log_in.assert_called_once()
+        qb.auth_log_out.assert_not_called()
+
+        # An expired session is logged in again lazily and the call retried.
+        qb.torrents_add_tags.side_effect = [Unauthorized401Error(), None]
+        async with DownloadClient() as client:
+            await client.set_tag("hash", "tag")
+        assert qb.auth_log_in.call_count == 2
+    qb.auth_log_out.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_qbittorrent_client_speaks_web_api():
+    seen = []
+
+    def handler(request: httpx2.Request) -> httpx2.Response:
+        seen.append(request)
+        match request.url.path:
+            case "/api/v2/auth/login":
+                return httpx2.Response(200, text="Ok.")
+            case "/api/v2/torrents/info":
+                return httpx2.Response(200, json=[{"hash": "a", "save_path": "/d"}])
+            case "/api/v2/torrents/files":
+                return httpx2.Response(200, json=[{"name": "a.mkv", "progress": 1}])
+            case "/api/v2/torrents/renameFile":
+                return httpx2.Response(409, text="Conflict")
+        return httpx2.Response(404)
+
+    client = QbittorrentClient("localhost:8080", "admin", "secret")
+    assert str(client._http.base_url) == "http://localhost:8080/api/v2/"
+    client._http = httpx2.AsyncClient(
+        base_url=client._http.base_url, transport=httpx2.MockTransport(handler)
+    )
+    await client.auth_log_in()
+    assert b"username=admin" in seen[-1].content
+
+    torrents = await client.torrents_info(category="Bangumi", torrent_hashes=["a", "b"])
+    assert seen[-1].url.params["hashes"] == "a|b"
+    assert "filter" not in seen[-1].url.params
+    await client.attach_files(torrents)
+    assert torrents[0].save_path == "/d"
+    assert torrents[0].files[0].name == "a.mkv"
+
+    with pytest.raises(Conflict409Error):
+        await client.torrents_rename_file("a", "a.mkv", "b.mkv")
+    await client.aclose()
+
+
+def test_torrent_mirror_applies_maindata_deltas():
+    mirror = TorrentMirror()
+    mirror.apply(
+        {
+            "rid": 1,
+            "full_update": True,
+            "torrents": {
+                "a": {"name": "A", "category": "Bangumi", "state": "stalledUP"},
+                "b": {"name": "B", "category": "Bangumi", "state": "downloading"},
+                "c": {"name": "C", "category": "", "state": "uploading"},
+                "d": {"name": "D", "category": "Bangumi", "state": "uploading"},
+                "e": {"name": "E", "category": "Bangumi", "state": "forcedDL"},
+            },
+        }
+    )
+    # A torrent that just finished and is seeding counts as completed.
+    assert [t.hash for t in mirror.select("Bangumi", "completed")] == ["a", "d"]
+    mirror.apply({"rid": 2, "torrents_removed": ["d", "e"]})
+
+    mirror.apply(
+        {
+            "rid": 3,
+            "torrents": {"b": {"state": "stoppedUP", "tags": "Show"}},
+            "torrents_removed": ["a"],
+        }
+    )
+    assert mirror.rid == 3
+    completed = mirror.select("Bangumi", "completed")
+    assert [(t.hash, t.name) for t in completed] == [("b", "B")]
+    assert mirror.select("Bangumi", tag="Show") == completed
+    assert mirror.select(None, tag="") == [mirror.torrents["c"]]
+    # Hashes from magnets may be uppercase.
+    assert mirror.select(None, hash=["B"]) == [mirror.torrents["b"]]
+    # Callers get copies they may decorate, e.g. with files.
+    completed[0]["files"] = []
+    assert "files" not in mirror.torrents["b"]
+
+    mirror.apply({"rid": 4, "full_update": True, "torrents": {}})
+    assert mirror.torrents == {}
+
+
+@pytest.mark.asyncio
+async def test_add_torrent_fetches_in_parallel(monkeypatch):
+    active = {"now": 0, "peak": 0}
+
+    class FakeRequest:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *args):
+            pass
+
+        async def get_torrent_or_magnet(self, torrent):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(0.01)
+            active["now"] -= 1
+            if torrent.name == "broken":
+                raise ValueError("bad bencode")
+            if torrent.name == "file":
+                return TorrentFile(b"d4:infod4:name1:aee", True, "f" * 40)
+            return f"magnet:?xt=urn:btih:{torrent.name}"
+
+    monkeypatch.setattr(download_client_module, "RequestContent", FakeRequest)
+    client = DownloadClient()
+    client._add_torrents = AsyncMock(return_value=True)
+    torrents = [Torrent(name=f"{i:040x}", url=f"https://a/{i}") for i in range(6)]
+    torrents.append(Torrent(name="file", url="https://a/file"))
+    torrents.append(Torrent(name="broken", url="https://a/broken"))
+    bangumi = Bangumi(id=1, official_title="t", save_path="/d")
+    assert await client.add_torrent(torrents, bangumi)
+    assert active["peak"] > 1
+    assert [t.downloaded for t in torrents] == [True] * 7 + [False]
+    assert torrents[0].hash == f"{0:040x}"
+    # The hash found while validating the download is reused.
+    assert torrents[6].hash == "f" * 40
+    assert len(client._add_torrents.await_args.kwargs["torrent_urls"]) == 6
+    assert client._add_torrents.await_args.kwargs["torrent_files"] == [
+        b"d4:infod4:name1:aee"
+    ]
+
+
+async def memory_database(monkeypatch):
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with Database(engine) as db:
+        await db.create_table()
+    monkeypatch.setattr(renamer_module, "Database", lambda: Database(engine))
+    return engine
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("retain", [False, True])
+async def test_renamer_skips_done_torrents_without_file_lists(monkeypatch, retain):
+    await memory_database(monkeypatch)
+    monkeypatch.setattr(settings.bangumi_manage, "retain_latest_media_version", retain)
+    monkeypatch.setattr(settings.bangumi_manage, "rename_method", "pn")
+
+    def make(_hash, episode, tags):
+        name = f"Title S01E{episode}.mkv"
+        return AttrDict(
+            hash=_hash,
+            name=name,
+            size=1,
+            save_path="/downloads/Bangumi/Title/Season 1",
+            content_path=f"/downloads/Bangumi/Title/Season 1/{name}",
+            completion_on=1,
+            tags=tags,
+        )
+
+    # "b" was renamed before and carries its tag; the default pass is for
+    # untagged torrents.
+    torrents = [make("a", "01", ""), make("b", "02", "Title")]
+    renamer = Renamer()
+    renamer.get_torrent_info = AsyncMock(
+        side_effect=lambda tag=None, **_: [
+            AttrDict(t) for t in torrents if tag is None or has_tag(t, tag)
+        ]
+    )
+    listed = []
+
+    async def attach_files(torrents):
+        listed.append(sorted(t.hash for t in torrents))
+        for t in torrents:
+            t["files"] = [AttrDict(name=t.name, size=1, progress=1)]
+
+    renamer.attach_files = attach_files
+    renamer.set_tag = AsyncMock()
+    renamer.rename_torrent_file = AsyncMock(return_value=True)
+
+    assert await renamer.rename() == []
+    renamer.rename_torrent_file.assert_not_awaited()
+    # Version pruning looks at every tag of the folder.
+    assert listed == [["a", "b"] if retain else ["a"]]
+    # Done now, whatever the tag: the next cycle decides from maindata alone.
+    assert await renamer.rename() == []
+    assert listed[-1] == []
+    # New files show up in the maindata fields, and the torrent is looked at again.
+    torrents[0]["completion_on"] = 2
+    await renamer.rename()
+    assert listed[-1] == (["a", "b"] if retain else ["a"])
+
+
+class RecordingClient:
+    """qBittorrent stand-in that keeps file lists and records every call."""
+
+    def __init__(self, files: dict[str, list[str]], conflicts=()):
+        self.files = files
+        self.conflicts = set(conflicts)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+
+    async def attach_files(self, torrents):
+        for t in torrents:
+            t["files"] = [
+                AttrDict(name=name, size=1, progress=1) for name in self.files[t.hash]
+            ]
+
+    async def torrents_rename_file(self, torrent_hash, old_path, new_path):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        self.calls.append(("rename", torrent_hash, old_path))
+        if old_path in self.conflicts:
+            raise Conflict409Error(old_path)
+        names = self.files[torrent_hash]
+        names[names.index(old_path)] = new_path
+
+    async def torrents_add_tags(self, tags, torrent_hashes):
+        self.calls.append(("add_tags", tags, sorted(torrent_hashes)))
+
+    async def torrents_remove_tags(self, tags, torrent_hashes):
+        self.calls.append(("remove_tags", tags, sorted(torrent_hashes)))
+
+    async def torrents_set_category(self, category, torrent_hashes):
+        self.calls.append(("set_category", category, sorted(torrent_hashes)))
+
+    async def torrents_delete(self, delete_files, torrent_hashes):
+        self.calls.append(("delete", sorted(torrent_hashes)))
+
+
+def episode_name(episode: int, suffix: str = ".mkv") -> str:
+    return f"[Sub] Title - {episode:02d} [1080p]{suffix}"
+
+
+@pytest.mark.asyncio
+async def test_run_renames_bounds_concurrency_and_keeps_failures(monkeypatch):
+    monkeypatch.setattr(settings.bangumi_manage, "rename_method", "pn")
+    monkeypatch.setattr(settings.bangumi_manage, "remove_bad_torrent", True)
+    files = {f"h{i}": [episode_name(i)] for i in range(1, 21)}
+    files["h1"].append(episode_name(1, ".sc.ass"))
+    files["c"] = [episode_name(21), episode_name(22)]
+    client = RecordingClient(files, conflicts={episode_name(5), episode_name(22)})
+    renamer = Renamer()
+    renamer._client = client
+    kwargs = {"bangumi_name": "Title", "method": "pn", "season": 1, "offset": 0}
+
+    ops = []
+    for i in range(1, 21):
+        ops += renamer.plan_file(
+            torrent_name=episode_name(i),
+            media_path=episode_name(i),
+            _hash=f"h{i}",
+            **kwargs,
+        )
+    ops += renamer.plan_collection(media_list=files["c"], _hash="c", **kwargs)
+    ops += renamer.plan_subtitles(
+        subtitle_list=files["h1"][1:],
+        torrent_name=episode_name(1),
+        _hash="h1",
+        **kwargs,
+    )
+    assert (
+        renamer.plan_file(
+            torrent_name="readme.txt", media_path="readme.txt", _hash="x", **kwargs
+        )
+        == []
+    )
+    assert ops[0].new_path == "Title S01E01.mkv"
+    assert ops[-1].new_path == "Title S01E01.zh.ass"
+
+    notifications = await renamer.run_renames(ops)
+    assert client.peak == renamer_module.RENAME_CONCURRENCY
+    assert len(client.calls) == len(ops) == 23
+    assert sorted(n.episode for n in notifications) == [
+        i for i in range(1, 21) if i != 5
+    ]
+    # Failed renames keep their torrent pending, a failed collection is bad.
+    assert {"h5", "c", "x"} <= renamer._pending
+    assert renamer._bad == {"c", "x"}
+
+
+@pytest.mark.asyncio
+async def test_renamer_batches_tags_and_records_failures(monkeypatch):
+    engine = await memory_database(monkeypatch)
+    monkeypatch.setattr(settings.bangumi_manage, "retain_latest_media_version", False)
+    monkeypatch.setattr(settings.bangumi_manage, "remove_bad_torrent", False)
+    monkeypatch.setattr(settings.bangumi_manage, "rename_method", "pn")
+    files = {
+        "a": [episode_name(1)],
+        "b": [episode_name(2), episode_name(2, ".sc.ass")],
+        "c": [episode_name(3), episode_name(4)],
+        "d": ["readme.txt"],
+    }
+    torrents = [
+        AttrDict(
+            hash=_hash,
+            name=names[0],
+            size=1,
+            save_path="/downloads/Bangumi/Title/Season 1",
+            content_path=f"/downloads/Bangumi/Title/Season 1/{names[0]}",
+            completion_on=1,
+            tags="",
+        )
+        for _hash, names in files.items()
+    ]
+    client = RecordingClient(files, conflicts={episode_name(1)})
+    renamer = Renamer()
+    renamer._client = client
+    renamer.get_torrent_info = AsyncMock(
+        side_effect=lambda **_: [AttrDict(t) for t in torrents]
+    )
+
+    renamed = await renamer.rename()
+    assert sorted(n.episode for n in renamed) == [2]
+    # Tag and category changes go out as one multi-hash call each.
+    assert [call for call in client.calls if call[0] != "rename"] == [
+        ("add_tags", "Title", ["a", "b", "c"]),
+        ("set_category", "BangumiCollection", ["c"]),
+        ("remove_tags", "Title", ["d"]),
+    ]
+    assert sorted(call[1] for call in client.calls if call[0] == "rename") == [
+        "a",
+        "b",
+        "b",
+        "c",
+        "c",
+    ]
+
+    client.calls.clear()
+    await renamer.rename()
+    # Only the failed rename is tried again; everything else is now done.
+    assert [call for call in client.calls if call[0] == "rename"] == [
+        ("rename", "a", episode_name(1))
+    ]
+    async with Database(engine) as db:
+        done = await db.rename.search_hashes(list(files))
+    assert sorted(done) == ["b", "c", "d"]
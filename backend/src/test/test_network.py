@@ -0,0 +1,289 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+
+import httpx2
+import pytest
+from torrentool.bencode import Bencode
+from torrentool.torrent import Torrent
+
+from module.models import RSSItem
+from module.network import (
+    FeedParser,
+    HostLimiter,
+    JSONCache,
+    RequestContent,
+    http_pool,
+)
+from module.utils import check_torrent, torrent_hash
+from module.utils.bencode import scan_torrent
+from module.utils.torrent_cache import TorrentCache
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_bounds_total_and_per_host():
+    limiter = HostLimiter(limit=3, per_host=2)
+    active: dict[str, int] = {}
+    peak = {"total": 0}
+    peak_host: dict[str, int] = {}
+
+    async def fetch(url: str, host: str):
+        async with limiter.acquire(url):
+            active[host] = active.get(host, 0) + 1
+            peak["total"] = max(peak["total"], sum(active.values()))
+            peak_host[host] = max(peak_host.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    await asyncio.gather(
+        *(fetch(f"https://a.example/{i}", "a") for i in range(5)),
+        *(fetch(f"https://b.example/{i}", "b") for i in range(5)),
+    )
+    assert peak["total"] == 3
+    assert peak_host == {"a": 2, "b": 2}
+
+
+@pytest.mark.asyncio
+async def test_request_url_borrows_pooled_client():
+    async with http_pool() as pool:
+        shared = pool.client
+        async with RequestContent() as first, RequestContent() as second:
+            assert first.session is second.session is shared
+        # Leaving the block must not close the shared client.
+        assert not shared.is_closed
+    assert shared.is_closed
+    async with RequestContent() as req:
+        assert req.session is not shared
+    assert req._client is None
+
+
+@pytest.mark.asyncio
+async def test_poll_torrents_uses_validators():
+    body = (
+        b"<rss><channel><title>t</title><item><title>[Sub] Title - 01</title>"
+        b"<link>https://a.example/1.torrent</link></item></channel></rss>"
+    )
+    seen_headers = []
+
+    def handler(request: httpx2.Request) -> httpx2.Response:
+        seen_headers.append(request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx2.Response(304)
+        return httpx2.Response(200, content=body, headers={"etag": '"v1"'})
+
+    rss = RSSItem(url="https://a.example/rss")
+    async with http_pool() as pool:
+        pool._client = httpx2.AsyncClient(transport=httpx2.MockTransport(handler))
+        async with RequestContent() as req:
+            first = await req.poll_torrents(rss)
+            assert first.torrents is not None
+            assert [t.name for t in first.torrents] == ["[Sub] Title - 01"]
+            assert first.etag == '"v1"'
+
+            rss.etag, rss.content_hash = first.etag, first.content_hash
+            second = await req.poll_torrents(rss)
+            assert second.unchanged
+            assert seen_headers[-1]["if-none-match"] == '"v1"'
+
+            # Identical body without a usable ETag is detected by its hash.
+            rss.etag = None
+            third = await req.poll_torrents(rss)
+            assert third.unchanged
+            forced = await req.poll_torrents(rss, force=True)
+            assert forced.torrents is not None
+
+
+@pytest.mark.asyncio
+async def test_get_torrents_survives_body_read_errors():
+    async def body():
+        yield (
+            b"<rss><channel><title>t</title><item><title>[Sub] Title - 01</title>"
+            b"<link>https://a.example/1.torrent</link></item>"
+        )
+        raise httpx2.ReadTimeout("read timed out")
+
+    def handler(_request: httpx2.Request) -> httpx2.Response:
+        return httpx2.Response(200, content=body())
+
+    async with http_pool() as pool:
+        pool._client = httpx2.AsyncClient(transport=httpx2.MockTransport(handler))
+        async with RequestContent() as req:
+            torrents = await req.get_torrents("https://a.example/rss")
+    assert [t.name for t in torrents] == ["[Sub] Title - 01"]
+
+
+def test_feed_parser_streams_items_and_stops_early():
+    items = b"".join(
+        b"<item><title>[Sub] Title - %02d</title>"
+        b"<link>https://a.example/%d.torrent</link></item>" % (i, i)
+        for i in range(5, 0, -1)
+    )
+    body = b"<rss><channel><ttl>30</ttl>" + items + b"</channel></rss>"
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    parser = FeedParser(_filter="(?!)")
+    torrents = [t for chunk in chunks for t in parser.feed(chunk)]
+    torrents += parser.close()
+    assert [t.url for t in torrents][:2] == [
+        "https://a.example/5.torrent",
+        "https://a.example/4.torrent",
+    ]
+    assert len(torrents) == 5
+    assert parser.ttl == 30
+
+    parser = FeedParser(_filter="(?!)", known={"https://a.example/3.torrent"})
+    torrents = []
+    for chunk in chunks:
+        torrents += parser.feed(chunk)
+        if parser.done:
+            break
+    assert [t.name for t in torrents] == ["[Sub] Title - 05", "[Sub] Title - 04"]
+
+    parser = FeedParser(_filter="(?!)", limit=1)
+    assert len(parser.feed(body)) == 1
+    assert parser.done
+
+
+@pytest.mark.asyncio
+async def test_poll_torrents_stops_at_watermark():
+    def item(i: int) -> bytes:
+        return (
+            b"<item><title>[Sub] Title - %02d</title>"
+            b"<link>https://a.example/%d.torrent</link></item>" % (i, i)
+        )
+
+    feed = {"body": b"<rss><channel>" + item(2) + item(1) + b"</channel></rss>"}
+
+    def handler(_: httpx2.Request) -> httpx2.Response:
+        return httpx2.Response(200, content=feed["body"])
+
+    rss = RSSItem(url="https://a.example/rss")
+    async with http_pool() as pool:
+        pool._client = httpx2.AsyncClient(transport=httpx2.MockTransport(handler))
+        async with RequestContent() as req:
+            first = await req.poll_torrents(rss, _filter="(?!)")
+            assert len(first.torrents) == 2
+            assert first.watermark == "https://a.example/2.torrent"
+
+            rss.watermark = first.watermark
+            feed["body"] = feed["body"].replace(b"<channel>", b"<channel>" + item(3))
+            second = await req.poll_torrents(rss, _filter="(?!)")
+            assert [t.url for t in second.torrents] == ["https://a.example/3.torrent"]
+            assert second.watermark == "https://a.example/3.torrent"
+
+            forced = await req.poll_torrents(rss, _filter="(?!)", force=True)
+            assert len(forced.torrents) == 3
+
+
+def test_feed_parser_empty_filter_keeps_everything():
+    body = (
+        b"<rss><channel><item><title>720p</title><link>u</link></item></channel></rss>"
+    )
+    parser = FeedParser(_filter="")
+    assert [t.name for t in parser.feed(body) + parser.close()] == ["720p"]
+
+
+def make_torrent(name: str) -> bytes:
+    info = {"name": name, "piece length": 16384, "pieces": b"\0" * 20, "length": 1}
+    return Bencode.encode({"announce": "http://t", "info": info})
+
+
+@pytest.mark.asyncio
+async def test_torrent_cache_is_content_addressed_and_bounded(tmp_path):
+    first, second = make_torrent("a"), make_torrent("b")
+    cache = TorrentCache(tmp_path, max_bytes=len(first) + len(second))
+    assert await cache.get("https://a/1") is None
+
+    info_hash = torrent_hash.from_torrent(first)
+    await cache.put("https://a/1", first, info_hash)
+    # Another url serving the same torrent shares the stored payload.
+    await cache.put("https://mirror/1", first, info_hash)
+    assert len(list(tmp_path.glob("*.torrent"))) == 1
+    assert await cache.get("https://mirror/1") == (first, info_hash)
+
+    second_hash = torrent_hash.from_torrent(second)
+    await cache.put("https://a/2", second, second_hash)
+    old = time.time() - 60
+    os.utime(tmp_path / f"{info_hash}.torrent", (old, old))
+    # Going over the bound evicts the least recently used payload.
+    third = make_torrent("c")
+    await cache.put("https://a/3", third, torrent_hash.from_torrent(third))
+    # Urls of the evicted payload go with it.
+    assert not cache._link("https://a/1").exists()
+    assert not cache._link("https://mirror/1").exists()
+    assert len(list((tmp_path / "urls").iterdir())) == 2
+    assert await cache.get("https://a/1") is None
+    assert await cache.get("https://a/2") == (second, second_hash)
+
+
+def test_scan_torrent_hashes_raw_info():
+    content = make_torrent("a")
+    scan = scan_torrent(content)
+    assert scan.valid
+    assert scan.v1 == Torrent(Bencode.decode(content)).info_hash
+    assert scan.v2 is None
+    assert torrent_hash.from_torrent(content) == scan.v1
+    magnet = f"magnet:?xt=urn:btih:{scan.v1.upper()}&dn=a"
+    assert torrent_hash.from_magnet(magnet) == scan.v1
+    b32 = base64.b32encode(bytes.fromhex(scan.v1)).decode().lower()
+    assert torrent_hash.from_magnet(f"magnet:?xt=urn:btih:{b32}") == scan.v1
+    for broken in (content[:-1], content + b"\n", content[:40], b"<html>", b"de"):
+        assert not check_torrent(broken)
+
+    v2 = Bencode.encode({"info": {"meta version": 2, "name": "a"}})
+    scan = scan_torrent(v2)
+    info = v2[v2.index(b"4:info") + 6 : -1]
+    assert scan.v1 is None
+    assert scan.v2 == hashlib.sha256(info).hexdigest()
+    assert scan.info_hash == scan.v2[:40]
+
+
+@pytest.mark.asyncio
+async def test_json_cache_ttl_negative_and_stale(tmp_path):
+    cache = JSONCache(
+        tmp_path,
+        ttl=100,
+        negative_ttl=10,
+        max_stale=1000,
+        is_negative=lambda data: not data["results"],
+    )
+    calls = []
+    answers = {"hit": {"results": [1]}, "miss": {"results": []}}
+
+    def fetch(name):
+        async def _fetch(_req):
+            calls.append(name)
+            return answers.get(name)
+
+        return _fetch
+
+    def backdate(key, seconds):
+        path = cache._path(key)
+        entry = json.loads(path.read_text())
+        entry["fetched"] -= seconds
+        path.write_text(json.dumps(entry))
+
+    assert await cache.get(("hit",), fetch("hit"), None) == {"results": [1]}
+    assert await cache.get(("hit",), fetch("hit"), None) == {"results": [1]}
+    assert await cache.get(("miss",), fetch("miss"), None) == {"results": []}
+    assert calls == ["hit", "miss"]
+    # Empty answers expire sooner than real ones.
+    backdate(("hit",), 50)
+    backdate(("miss",), 50)
+    await cache.get(("hit",), fetch("hit"), None)
+    assert calls == ["hit", "miss"]
+    # Stale entries are served at once and refreshed in the background.
+    answers["miss"] = {"results": [2]}
+    assert await cache.get(("miss",), fetch("miss"), None) == {"results": []}
+    await asyncio.gather(*cache._refreshing.values())
+    assert await cache.get(("miss",), fetch("miss"), None) == {"results": [2]}
+    assert calls == ["hit", "miss", "miss"]
+    # Failures are not stored; expired data is still better than nothing.
+    assert await cache.get(("gone",), fetch("gone"), None) is None
+    assert not cache._path(("gone",)).exists()
+    backdate(("hit",), 5000)
+    answers.pop("hit")
+    assert await cache.get(("hit",), fetch("hit"), None) == {"results": [1]}
@@ -1,11 +1,11 @@
 import asyncio
 import time
 
+import httpx2
 import pytest
 import pytest_asyncio
 from loguru import logger
 from qbittorrentapi.exceptions import APIConnectionError, Forbidden403Error, LoginFailed
-from requests.exceptions import ConnectionError
 
 import module.conf.config as conf_module
 import module.core.status as status_module
@@ -26,8 +26,8 @@ async def wait_until(condition, timeout=5):
 
 def connection_error():
     try:
-        raise ConnectionError("down")
-    except ConnectionError:
+        raise httpx2.ConnectError("down")
+    except httpx2.ConnectError:
         raise APIConnectionError("cannot connect") from None
 
 
@@ -1,4 +1,7 @@
-from module.parser.analyser import raw_parser
+import pydantic
+import pytest
+
+from module.parser.analyser import raw_parser, raw_parser_cache_info
 
 
 def test_raw_parser():
@@ -109,3 +112,27 @@ def test_raw_parser():
     assert info.resolution == "1080p"
     assert info.episode == 2
     assert info.season == 1
+
+
+def test_raw_parser_memoizes_normalized_titles():
+    content = "【喵萌奶茶屋】★04月新番★[夏日重现/Summer Time Rendering][11][1080p][繁日双语][招募翻译]"
+    before = raw_parser_cache_info()
+    first = raw_parser(content)
+    # Same title once pre-processed: brackets and whitespace are normalized.
+    second = raw_parser(" " + content.replace("【", "[").replace("】", "]"))
+    after = raw_parser_cache_info()
+    assert second is first
+    assert after.hits - before.hits >= 1
+    assert after.misses - before.misses <= 1
+    with pytest.raises(pydantic.ValidationError):
+        first.episode = 12
+
+
+def test_raw_parser_group_with_regex_characters():
+    info = raw_parser("[x(y] Title Name - 01 [1080p]")
+    assert info is not None
+    assert info.group == "x(y"
+    assert info.title_en == "Title Name"
+    info = raw_parser("[DBD-Raws+][孤独摇滚！/Bocchi the Rock!][01][1080P][MKV]")
+    assert info is not None
+    assert info.title_en == "Bocchi the Rock!"
@@ -1,10 +1,27 @@
+from unittest.mock import AsyncMock
+
 import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.pool import StaticPool
 
+import module.api.config as config_api
+import module.conf.config as config_module
+from module.conf import settings
+from module.models import Bangumi, Config, RSSItem, Torrent
+from module.network import FeedResult
 from module.rss.engine import RSSEngine
 
 from .test_database import engine as e
 
 
+def memory_engine():
+    return create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
 @pytest.mark.asyncio
 async def test_rss_engine():
     async with RSSEngine(e) as engine:
@@ -21,3 +38,97 @@ async def test_rss_engine():
             torrent.name
             == "[Lilith-Raws] 无职转生，到了异世界就拿出真本事 / Mushoku Tensei - 11 [Baha][WEB-DL][1080p][AVC AAC][CHT][MP4]"
         )
+
+
+@pytest.mark.asyncio
+async def test_match_torrent_skips_invalid_stored_filter():
+    db_engine = memory_engine()
+    async with RSSEngine(db_engine) as engine:
+        await engine.create_table()
+        # Saved before filters were validated.
+        await engine.bangumi.add_all(
+            [
+                Bangumi(
+                    official_title="Broken",
+                    title_raw="Broken",
+                    filter="[720",
+                    rss_link="https://b/rss",
+                ),
+                Bangumi(
+                    official_title="Good",
+                    title_raw="Good",
+                    filter="720",
+                    rss_link="https://a/rss",
+                ),
+            ]
+        )
+        assert await engine.match_torrent(Torrent(name="Broken - 01", url="u")) is None
+        good = await engine.match_torrent(Torrent(name="Good - 01 1080p", url="u"))
+        assert good is not None and good.title_raw == "Good"
+        assert (
+            await engine.match_torrent(Torrent(name="Good - 01 720p", url="u")) is None
+        )
+        assert await engine._regular_filter(RSSItem(url="https://a/rss")) == "720"
+        # The broken feed is polled unfiltered instead of failing.
+        assert await engine._regular_filter(RSSItem(url="https://b/rss")) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_add_keeps_watermark(monkeypatch):
+    async with RSSEngine(memory_engine()) as engine:
+        await engine.create_table()
+        await engine.bangumi.add_all(
+            [Bangumi(official_title="Show", title_raw="Show", rss_link="https://a")]
+        )
+        rss = RSSItem(url="https://a", watermark="https://a/0", etag='"v0"')
+        await engine.rss.add(rss)
+        rss = await engine.rss.search_url("https://a")
+        torrents = [Torrent(name="Show - 02", url="https://a/2")]
+        result = FeedResult(torrents, '"v1"', None, "hash", "https://a/2")
+        monkeypatch.setattr(
+            engine, "fetch_rss_items", AsyncMock(return_value=[(rss, result)])
+        )
+        client = AsyncMock()
+        client.add_torrent.return_value = False
+        await engine.refresh_rss(client)
+        rss = await engine.rss.search_url("https://a")
+        assert (rss.watermark, rss.etag, rss.content_hash) == (
+            "https://a/0",
+            None,
+            None,
+        )
+
+        client.add_torrent.return_value = True
+        result.torrents = [Torrent(name="Show - 02", url="https://a/2")]
+        await engine.refresh_rss(client)
+        rss = await engine.rss.search_url("https://a")
+        assert (rss.watermark, rss.etag) == ("https://a/2", '"v1"')
+
+
+@pytest.mark.asyncio
+async def test_global_filter_change_rescans_feeds(monkeypatch, tmp_path):
+    db_engine = memory_engine()
+    monkeypatch.setattr(config_module, "CONFIG_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(config_api, "RSSEngine", lambda: RSSEngine(db_engine))
+    # update_config reloads the global settings; put them back afterwards.
+    for key in Config.model_fields:
+        monkeypatch.setattr(settings, key, getattr(settings, key))
+    async with RSSEngine(db_engine) as engine:
+        await engine.create_table()
+        await engine.rss.add(
+            RSSItem(url="https://a.example/rss", etag='"v1"', watermark="https://a/1")
+        )
+
+    async def watermark():
+        async with RSSEngine(db_engine) as engine:
+            return (await engine.rss.search_url("https://a.example/rss")).watermark
+
+    config = Config.model_validate_json(settings.model_dump_json(by_alias=True))
+    assert (await config_api.update_config(config)).status_code == 200
+    assert await watermark() == "https://a/1"
+
+    # Items the old global filter dropped must be parsed again.
+    config.rss_parser.filter = [*config.rss_parser.filter, "HEVC"]
+    assert (await config_api.update_config(config)).status_code == 200
+    assert settings.rss_parser.filter[-1] == "HEVC"
+    assert await watermark() is None
@@ -0,0 +1,36 @@
+from module.conf import settings
+from module.models import RSSItem
+from module.rss import scheduler
+
+
+def test_reschedule_backs_off_and_speeds_up(monkeypatch):
+    monkeypatch.setattr(settings.program, "rss_time", 900)
+    monkeypatch.setattr(scheduler, "JITTER", 0)
+    rss = RSSItem(url="https://a.example/rss")
+    assert scheduler.is_due(rss, now=0)
+
+    scheduler.reschedule(rss, changed=False, now=0)
+    assert rss.poll_interval == 1350
+    assert rss.next_poll == 1350
+    assert not scheduler.is_due(rss, now=1000)
+    for _ in range(10):
+        scheduler.reschedule(rss, changed=False, now=0)
+    assert rss.poll_interval == 900 * scheduler.MAX_BACKOFF
+
+    for _ in range(10):
+        scheduler.reschedule(rss, changed=True, now=0)
+    assert rss.poll_interval == 225
+
+
+def test_reschedule_honours_feed_hints(monkeypatch):
+    monkeypatch.setattr(settings.program, "rss_time", 900)
+    monkeypatch.setattr(scheduler, "JITTER", 0)
+    rss = RSSItem(url="https://a.example/rss")
+
+    scheduler.reschedule(rss, changed=True, ttl=60, now=0)
+    assert rss.poll_interval == 3600
+    scheduler.reschedule(rss, changed=True, retry_after=10**9, now=0)
+    assert rss.next_poll == scheduler.MAX_HINT
+
+    other = RSSItem(url="https://b.example/rss", next_poll=500)
+    assert scheduler.seconds_until_due([rss, other], now=100) == 400
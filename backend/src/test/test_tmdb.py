@@ -1,7 +1,13 @@
+import asyncio
+import importlib
+
 import pytest
 
 from module.parser.analyser.tmdb_parser import tmdb_parser
 
+# The package re-exports the function under the module's name.
+tmdb = importlib.import_module("module.parser.analyser.tmdb_parser")
+
 
 @pytest.mark.asyncio
 async def test_tmdb_parser():
@@ -15,3 +21,34 @@ async def test_tmdb_parser():
     assert tmdb_info.title == "冰海战记"
     assert tmdb_info.year == bangumi_year
     assert tmdb_info.last_season == bangumi_season
+
+
+@pytest.mark.asyncio
+async def test_candidates_are_probed_concurrently(monkeypatch):
+    shows = {
+        1: {"id": 1, "name": "Drama", "genres": [{"id": 18}]},
+        2: {"id": 2, "name": "Anime", "genres": [{"id": 16}], "seasons": []},
+        3: {"id": 3, "name": "Other anime", "genres": [{"id": 16}]},
+    }
+    calls = []
+    active = {"now": 0, "peak": 0}
+
+    async def search_tv(_req, _title):
+        return {"results": [{"id": i} for i in shows]}
+
+    async def tv_info(_req, tv_id, _language):
+        calls.append(tv_id)
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return shows[tv_id]
+
+    monkeypatch.setattr(tmdb, "search_tv", search_tv)
+    monkeypatch.setattr(tmdb, "tv_info", tv_info)
+    info = await tmdb_parser("title", "zh", test=True)
+    assert info.id == 2
+    assert info.title == "Anime"
+    # One lookup per candidate, all in flight together, none repeated.
+    assert sorted(calls) == [1, 2, 3]
+    assert active["peak"] == 3
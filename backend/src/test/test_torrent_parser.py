@@ -4,7 +4,11 @@ import pytest
 
 from module.models import EpisodeFile, SubtitleFile
 from module.parser.analyser import torrent_name_parser, torrent_parser
-from module.parser.analyser.torrent_parser import get_path_basename
+from module.parser.analyser.torrent_parser import (
+    get_path_basename,
+    get_season_and_title,
+    match_episode,
+)
 
 
 def test_torrent_parser():
@@ -98,6 +102,25 @@ def test_torrent_parser():
     assert bf.episode == 2
 
 
+def test_match_episode_keeps_rule_order():
+    # " - 12" (first rule) wins over "[03]" (second rule).
+    assert match_episode("[Group] Title [03] - 12 [1080p]") == (
+        "[Group] Title [03]",
+        "12",
+    )
+    assert match_episode("[Group] Title [03][1080p]") == ("[Group] Title ", "03")
+    assert match_episode("Title EP07") == ("Title ", "07")
+    assert match_episode("Title") is None
+
+
+def test_get_season_and_title():
+    assert get_season_and_title("Title S2") == ("Title", 2)
+    assert get_season_and_title("Title Season 3") == ("Title", 3)
+    # Any case sets the season, only the usual spellings leave the title.
+    assert get_season_and_title("Title SEASON 4") == ("Title SEASON 4", 4)
+    assert get_season_and_title("Title") == ("Title", 1)
+
+
 class TestGetPathBasename:
     def test_regular_path(self):
         assert get_path_basename("/path/to/file.txt") == "file.txt"
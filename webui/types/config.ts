@@ -5,6 +5,8 @@ export interface Config {
     rss_time: number;
     rename_time: number;
     webui_port: number;
+    rss_concurrency: number;
+    rss_host_concurrency: number;
   };
   downloader: {
     host: string;
@@ -61,6 +63,8 @@ export const initConfig: Config = {
     rss_time: 0,
     rename_time: 0,
     webui_port: 0,
+    rss_concurrency: 0,
+    rss_host_concurrency: 0,
   },
   downloader: {
     host: '',